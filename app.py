@@ -9,9 +9,17 @@ Run:
 """
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from pathlib import Path
+import numpy as np
 import traceback
+from datetime import date, timedelta
+
+from charts import adaptive_scatter, count_heatmap
+from cube import cube_measures
+from dataset import InjuryDataset
+from injury_data import memory_report
+from intervals import week_start
+from perf import Profiler, enabled_by_default, stage
+from trendline import add_trendlines, fit_lines
 
 st.set_page_config(page_title="Player Injuries & Team Performance", layout="wide")
 
@@ -19,47 +27,222 @@ st.set_page_config(page_title="Player Injuries & Team Performance", layout="wide
 CSV_PATH = ("player_injuries_impact_cleaned.csv")
 
 # ---------- helpers ----------
-def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
-    return df
-
-def to_numeric_safe(df: pd.DataFrame, cols):
-    for c in cols:
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
-    return df
-
-def parse_dates_safe(df: pd.DataFrame, cols):
-    for c in cols:
-        if c in df.columns:
-            try:
-                df[c] = pd.to_datetime(df[c], errors="coerce")
-            except Exception:
-                pass
-    return df
-
-def mean_of_cols(df, col_list, new_col):
-    present = [c for c in col_list if c in df.columns]
-    if not present:
-        df[new_col] = pd.NA
-        return df
-    df[new_col] = df[present].astype(float).mean(axis=1, skipna=True)
-    return df
-
 def has_cols(df, cols):
     return all(c in df.columns for c in cols)
 
+# filter dims (with their fallback names) and the measures kept in the aggregate cube
+FILTER_DIMS = ('player_name', 'name', 'team', 'team_name', 'season', 'injury_month')
+CUBE_MEASURES = ('performance_drop_index', 'avg_rating_before', 'avg_rating_after', 'fifa_rating')
+# dims of the coarse cube: totals, team counts and the heatmap never need per-player cells
+COARSE_DIMS = ('team', 'team_name', 'season', 'injury_month')
+QUERY_CACHE_MB = 64     # shared by every session of this server process
+
+@st.cache_resource(show_spinner=False)
+def get_dataset(csv_path):
+    # one live dataset (frame + filter index + cube + query cache) per process, shared by all sessions
+    return InjuryDataset(csv_path, FILTER_DIMS, CUBE_MEASURES, coarse_dims=COARSE_DIMS, cache_mb=QUERY_CACHE_MB)
+
+# ---------- shared queries ----------
+# Each query runs through snap.query(fn, choices, *args): the first session to
+# ask computes it, every other session with the same filters gets the cached
+# result. Results are shared, so sections must not modify them in place.
+# snap.rollup() uses the coarse cube unless a player is grouped or filtered.
+def q_summary(snap, choices, name_col):
+    total = snap.rollup([], choices).iloc[0]
+    return {
+        'n': int(total['n']),
+        'fifa_rating': total['fifa_rating_mean'] if 'fifa_rating' in cube_measures(snap.cube) else None,
+        'players': len(snap.rollup([name_col], choices)) if name_col else 0,
+        'drops': total['performance_drop_index_count'] if 'performance_drop_index' in cube_measures(snap.cube) else 0,
+    }
+
+def q_top_drops(snap, choices, col):
+    bar_df = snap.rollup([col], choices).dropna(subset=['performance_drop_index_mean'])
+    bar_df = bar_df[[col, 'performance_drop_index_mean']].rename(columns={'performance_drop_index_mean': 'performance_drop_index'})
+    return bar_df.sort_values('performance_drop_index', ascending=False)
+
+def q_team_counts(snap, choices, team_col):
+    counts = snap.rollup([team_col], choices)[[team_col, 'n']]
+    counts = counts.sort_values('n', ascending=False, kind='stable')
+    counts.columns = [team_col, 'injury_count']
+    return counts
+
+def q_month_team(snap, choices, team_col):
+    return snap.rollup(['injury_month', team_col], choices).rename(columns={'n': 'count'})
+
+def q_age_points(snap, choices, name_col, team_col):
+    """(y column, title, points): only the columns the scatter needs, not the filtered frame."""
+    view = snap.index.take(snap.frame, choices)
+    if 'age' in view.columns and 'performance_drop_index' in view.columns and view.dropna(subset=['age','performance_drop_index']).shape[0] > 0:
+        y_col, title4 = 'performance_drop_index', "Age vs performance drop"
+    elif 'age' in view.columns and 'fifa_rating' in view.columns and view.dropna(subset=['age','fifa_rating']).shape[0] > 0:
+        y_col, title4 = 'fifa_rating', "Age vs FIFA rating"
+    else:
+        return None, None, None
+    cols = ['age', y_col] + [c for c in [name_col, team_col, 'position'] if c and c in view.columns]
+    return y_col, title4, view.dropna(subset=['age', y_col])[cols]
+
+def q_age_fit(snap, choices, name_col, team_col, group_col):
+    y_col, _, sc = snap.query(q_age_points, choices, name_col, team_col)
+    return fit_lines(sc['age'], sc[y_col], sc[group_col] if group_col else None)
+
+def q_comebacks(snap, choices, name_col):
+    summary = snap.rollup([name_col], choices)[[name_col, 'avg_rating_before_mean', 'avg_rating_after_mean']]
+    summary.columns = [name_col, 'avg_rating_before', 'avg_rating_after']
+    summary['improvement'] = summary['avg_rating_after'] - summary['avg_rating_before']
+    return summary.sort_values('improvement', ascending=False)
+
+def q_out_on(snap, choices, day, team, cols):
+    out = snap.frame.take(snap.absences.out_on(day, team))
+    return out[[c for c in cols if c in out.columns]].sort_values('date_of_injury')
+
+def q_weekly_absences(snap, choices, team):
+    weekly = snap.absences.weekly()
+    counts = weekly[weekly['team'] == team].set_index('week')['absent'] if team else weekly.groupby('week')['absent'].sum()
+    # weekly() lists only weeks with absences: put the empty weeks back as 0 so the line drops to 0
+    first, last = snap.absences.first_day, snap.absences.last_day
+    weeks = np.datetime_as_string(np.arange(week_start(first), last + 1, 7).astype('datetime64[D]'))
+    return counts.reindex(weeks, fill_value=0).rename_axis('week').reset_index()
+
+# ---------- sections ----------
+# Each visual is a fragment: only the selected section runs, and a change to a
+# widget inside a section reruns just that section. plotly is imported on first use.
+@st.fragment
+def section_top_drops(snap, choices, summary, name_col, team_col):
+    st.subheader("Top players by performance drop")
+    if 'performance_drop_index' in cube_measures(snap.cube) and summary['drops'] > 0:
+        import plotly.express as px
+        top_n = st.slider("Players shown", 5, 50, 15)
+        name_for_plot = name_col if name_col else team_col
+        bar_df = snap.query(q_top_drops, choices, name_for_plot).head(top_n)
+        with stage("v1.figure", rows=len(bar_df)):
+            fig1 = px.bar(bar_df, x=name_for_plot, y='performance_drop_index', title="Top performance drops (higher = bigger drop)", labels={'performance_drop_index':'Performance drop'})
+            st.plotly_chart(fig1, use_container_width=True)
+    else:
+        st.info("performance_drop_index not available. Ensure avg_rating_before & avg_rating_after or performance_drop_index are present.")
+
+@st.fragment
+def section_team_counts(snap, choices, team_col):
+    st.subheader("Injury counts by team")
+    if team_col:
+        import plotly.express as px
+        counts = snap.query(q_team_counts, choices, team_col)
+        with stage("v2.figure", rows=len(counts)):
+            fig2 = px.bar(counts, x=team_col, y='injury_count', title="Injury counts by team")
+            st.plotly_chart(fig2, use_container_width=True)
+    else:
+        st.info("Team column not found (team/team_name).")
+
+@st.fragment
+def section_heatmap(snap, choices, team_col):
+    st.subheader("Injury frequency — Month × Team (heatmap)")
+    if 'injury_month' in snap.cube.columns and team_col:
+        heat = snap.query(q_month_team, choices, team_col)
+        if len(heat) and heat['count'].sum() > 0:
+            # the count matrix is drawn as-is: payload is months x teams, whatever the row count
+            with stage("v3.figure", rows=len(heat)):
+                fig3 = count_heatmap(heat, x='injury_month', y=team_col, title="Injury frequency by month & team")
+                st.plotly_chart(fig3, use_container_width=True)
+        else:
+            st.info("No injury counts to show in heatmap (filtered data).")
+    else:
+        st.info("To show heatmap, need 'injury_month' and team column present.")
+
+@st.fragment
+def section_age(snap, choices, name_col, team_col):
+    st.subheader("Age vs performance drop / rating")
+    y_col, title4, sc = snap.query(q_age_points, choices, name_col, team_col)
+    if y_col:
+        group_options = {"Overall": None, "Team": team_col, "Position": 'position' if 'position' in sc.columns else None}
+        trend_by = st.radio("Trendline per", [k for k, v in group_options.items() if k == "Overall" or v], horizontal=True)
+        group_col = group_options[trend_by]
+        with stage("v4.trendline", rows=len(sc)):
+            fits = snap.query(q_age_fit, choices, name_col, team_col, group_col)
+        with stage("v4.figure", rows=len(sc)):
+            # raw points while small, WebGL / server-side 2-D bins as the filtered set grows
+            fig4 = adaptive_scatter(sc, x='age', y=y_col, color=group_col, hover_data=[c for c in [name_col, team_col] if c in sc.columns], title=title4)
+            add_trendlines(fig4, fits)
+            st.plotly_chart(fig4, use_container_width=True)
+        with st.expander("Trendline fit (least squares)"):
+            st.dataframe(fits.round(4))
+    else:
+        st.info("No valid data for age comparison (need 'age' plus 'performance_drop_index' or 'fifa_rating').")
+
+@st.fragment
+def section_leaderboard(snap, choices, name_col):
+    st.subheader("Leaderboard — Best comebacks (avg_after − avg_before)")
+    if 'avg_rating_before' in cube_measures(snap.cube) and 'avg_rating_after' in cube_measures(snap.cube) and name_col:
+        top_n = st.slider("Rows shown", 5, 100, 20)
+        top_improve = snap.query(q_comebacks, choices, name_col).head(top_n)
+        with stage("v5.table", rows=len(top_improve)):
+            st.dataframe(top_improve.round(3))
+    else:
+        st.info("Comeback leaderboard requires 'avg_rating_before' and 'avg_rating_after' columns and a player name column.")
+
+@st.fragment
+def section_availability(snap, choices, name_col, team_col):
+    st.subheader("Availability — who is out, and for how long")
+    absences = snap.absences
+    if absences is None or len(absences) == 0:
+        st.info("Availability needs 'date_of_injury' and 'date_of_return' columns with both dates filled in.")
+        return
+    # the sidebar team filter applies here; the other filters do not (they describe the injury, not the day)
+    team = choices.get(team_col) if team_col and choices.get(team_col) != "All" else None
+    first, last = date(1970, 1, 1) + timedelta(days=absences.first_day), date(1970, 1, 1) + timedelta(days=absences.last_day)
+    day = st.slider("Date", min_value=first, max_value=last, value=first + (last - first) / 2, step=timedelta(days=1), format="YYYY-MM-DD")
+
+    with stage("v6.out_on") as rec:
+        cols = [name_col, team_col, 'position', 'injury', 'date_of_injury', 'date_of_return']
+        out = snap.query(q_out_on, {}, day, team, cols)
+        rec["rows"] = len(out)
+    st.metric(f"Out on {day:%Y-%m-%d}" + (f" — {team}" if team else ""), len(out))
+    st.dataframe(out, hide_index=True)
+
+    import plotly.express as px
+    weekly = snap.query(q_weekly_absences, {}, team)
+    with stage("v6.figure", rows=len(weekly)):
+        fig6 = px.line(weekly.assign(week=pd.to_datetime(weekly['week'])), x='week', y='absent', markers=True,
+                       title="Concurrent absences per week" + (f" — {team}" if team else " (all teams)"))
+        fig6.add_vline(x=pd.Timestamp(day), line_dash="dot")
+        st.plotly_chart(fig6, use_container_width=True)
+
+    durations = absences.durations(team)
+    c1, c2 = st.columns(2)
+    with c1:
+        # weekly buckets: the payload is bounded by the longest absence, not the row count
+        buckets = np.bincount(durations // 7)
+        fig7 = px.bar(x=np.arange(len(buckets)) * 7, y=buckets, labels={'x': 'Recovery days (7-day buckets)', 'y': 'Absences'},
+                      title="Recovery duration distribution")
+        st.plotly_chart(fig7, use_container_width=True)
+    with c2:
+        q = absences.duration_quantiles(team=team)
+        st.dataframe(pd.DataFrame({'quantile': [f"{p:.0%}" for p in q.index], 'days': q.values}), hide_index=True)
+        within = absences.recovered_within([7, 30, 90], team=team)
+        st.caption(" · ".join(f"≤ {d} days: {s:.0%}" for d, s in zip([7, 30, 90], within)))
+
 # ---------- UI ----------
 st.title("Player Injuries & Team Performance")
 st.write("Loading cleaned CSV from fixed path. If you want to use a different file, replace the CSV at the path above and restart the app.")
 
+# ---------- profiling ----------
+# sidebar layout: filters first, the Performance panel below them
+filters_box = st.sidebar.container()
+perf_panel = st.sidebar.expander("Performance")
+profiling = perf_panel.toggle("Record stage timings", value=enabled_by_default())
+# wall time + rows only: tracemalloc is process-wide, so one session's profiling
+# would slow every session and mix their peaks
+prof = Profiler(enabled=profiling, trace_memory=False).activate()
+
 # ---------- load ----------
-p = Path(CSV_PATH)
+# The CSV is parsed + cleaned once and kept as a Parquet snapshot (keyed by path,
+# size, mtime and schema version). refresh() only parses rows appended since.
 try:
-    if not p.exists():
-        raise FileNotFoundError(f"File not found: {CSV_PATH}")
-    raw = pd.read_csv(p, low_memory=False)
+    with stage("load.dataset") as rec:
+        data = get_dataset(CSV_PATH)
+        rec["mode"] = data.refresh()
+    # one consistent version for this whole run, even if another session refreshes meanwhile
+    snap = data.snapshot()
+    df, index = snap.frame, snap.index
     source = CSV_PATH
 except Exception as e:
     st.error("Could not load the cleaned CSV from the fixed path.")
@@ -67,135 +250,66 @@ except Exception as e:
         st.text(traceback.format_exc())
     st.stop()
 
-# ---------- normalize & parse ----------
-df = normalize_columns(raw)
-df = parse_dates_safe(df, ['date_of_injury', 'date_of_return', 'date_of_injury', 'date_of_return'])
-# numeric conversions
-df = to_numeric_safe(df, ['fifa_rating', 'age', 'avg_rating_before', 'avg_rating_after', 'performance_drop_index',
-                          'team_gd_before', 'team_gd_missed'])
-
-# compute derived if needed
-# If avg_rating_before/after don't exist but individual match ratings do, compute them
-before_cols = ['match1_before_injury_player_rating', 'match2_before_injury_player_rating', 'match3_before_injury_player_rating']
-after_cols = ['match1_after_injury_player_rating', 'match2_after_injury_player_rating', 'match3_after_injury_player_rating']
-df = mean_of_cols(df, before_cols, 'rating_before_avg')
-df = mean_of_cols(df, after_cols, 'rating_after_avg')
-# unify names: prefer avg_rating_before/after if present, else fallback to computed
-if 'avg_rating_before' not in df.columns and 'rating_before_avg' in df.columns:
-    df['avg_rating_before'] = df['rating_before_avg']
-if 'avg_rating_after' not in df.columns and 'rating_after_avg' in df.columns:
-    df['avg_rating_after'] = df['rating_after_avg']
-# performance_drop_index fallback
-if 'performance_drop_index' not in df.columns:
-    if 'avg_rating_before' in df.columns and 'avg_rating_after' in df.columns:
-        df['performance_drop_index'] = df['avg_rating_before'] - df['avg_rating_after']
-
-# injury month extraction
-if 'date_of_injury' in df.columns:
-    df['injury_month'] = df['date_of_injury'].dt.to_period('M').astype(str)
-elif 'injury_month' not in df.columns:
-    df['injury_month'] = pd.NA
-
 # ---------- show debug info ----------
 st.markdown(f"**Data source:** `{source}` — rows: **{len(df)}**, cols: **{len(df.columns)}**")
-with st.expander("Column list (normalized) — check these names"):
+# only sent to the browser when asked for
+if st.toggle("Show column list (normalized) and memory usage"):
     st.write(list(df.columns))
+    st.dataframe(memory_report(df))
 
 # ---------- sidebar filters ----------
-st.sidebar.header("Filters")
-players = sorted(df['player_name'].dropna().unique().tolist()) if 'player_name' in df.columns else (sorted(df['name'].dropna().unique().tolist()) if 'name' in df.columns else [])
-teams = sorted(df['team'].dropna().unique().tolist()) if 'team' in df.columns else (sorted(df['team_name'].dropna().unique().tolist()) if 'team_name' in df.columns else [])
-seasons = sorted(df['season'].dropna().unique().tolist()) if 'season' in df.columns else []
-
-player_choice = st.sidebar.selectbox("Player", options=["All"] + players)
-team_choice = st.sidebar.selectbox("Team", options=["All"] + teams)
-season_choice = st.sidebar.selectbox("Season", options=["All"] + seasons)
-month_choice = st.sidebar.selectbox("Injury month", options=["All"] + (sorted(df['injury_month'].dropna().unique().tolist()) if 'injury_month' in df.columns else ["All"]))
-
-# apply filters
-view = df.copy()
-name_col = 'player_name' if 'player_name' in view.columns else ('name' if 'name' in view.columns else None)
-team_col = 'team' if 'team' in view.columns else ('team_name' if 'team_name' in view.columns else None)
-
-if player_choice != "All" and name_col:
-    view = view[view[name_col] == player_choice]
-if team_choice != "All" and team_col:
-    view = view[view[team_col] == team_choice]
-if season_choice != "All" and 'season' in view.columns:
-    view = view[view['season'] == season_choice]
-if month_choice != "All" and 'injury_month' in view.columns:
-    view = view[view['injury_month'] == month_choice]
-
-st.sidebar.write(f"Rows after filters: {view.shape[0]}")
+name_col = 'player_name' if 'player_name' in df.columns else ('name' if 'name' in df.columns else None)
+team_col = 'team' if 'team' in df.columns else ('team_name' if 'team_name' in df.columns else None)
+
+filters_box.header("Filters")
+players = index.options(name_col)
+teams = index.options(team_col)
+seasons = index.options('season')
+months = index.options('injury_month')
+
+player_choice = filters_box.selectbox("Player", options=["All"] + players)
+team_choice = filters_box.selectbox("Team", options=["All"] + teams)
+season_choice = filters_box.selectbox("Season", options=["All"] + seasons)
+month_choice = filters_box.selectbox("Injury month", options=["All"] + months)
+
+choices = {name_col: player_choice, team_col: team_choice, 'season': season_choice, 'injury_month': month_choice}
+# the metrics and visuals 1, 2, 3 and 5 are rolled up from the aggregate cube;
+# raw filtered rows are only taken (from the filter index) inside visual 4
+summary = snap.query(q_summary, choices, name_col)
+
+filters_box.write(f"Rows after filters: {summary['n']}")
 
 # ---------- metrics ----------
 c1, c2, c3 = st.columns(3)
-c1.metric("Records (filtered)", int(view.shape[0]))
-if 'fifa_rating' in view.columns:
-    c2.metric("Avg rating", round(view['fifa_rating'].mean(skipna=True), 3))
+c1.metric("Records (filtered)", summary['n'])
+if summary['fifa_rating'] is not None:
+    c2.metric("Avg rating", round(summary['fifa_rating'], 3))
 else:
     c2.metric("Avg rating", "N/A")
-c3.metric("Unique players", int(view[name_col].nunique()) if name_col else 0)
+c3.metric("Unique players", summary['players'])
 
 st.markdown("---")
 
-# ---------- VISUAL 1: Top performance drops ----------
-st.subheader("Top players by performance drop")
-if 'performance_drop_index' in view.columns and view['performance_drop_index'].notna().any():
-    name_for_plot = name_col if name_col else (team_col if team_col else view.index.name)
-    bar_df = view[[name_for_plot, 'performance_drop_index']].dropna(subset=['performance_drop_index']).groupby(name_for_plot).mean().reset_index().sort_values('performance_drop_index', ascending=False).head(15)
-    fig1 = px.bar(bar_df, x=name_for_plot, y='performance_drop_index', title="Top performance drops (higher = bigger drop)", labels={'performance_drop_index':'Performance drop'})
-    st.plotly_chart(fig1, use_container_width=True)
-else:
-    st.info("performance_drop_index not available. Ensure avg_rating_before & avg_rating_after or performance_drop_index are present.")
+# ---------- visuals: one section at a time ----------
+SECTIONS = {
+    "Top performance drops": lambda: section_top_drops(snap, choices, summary, name_col, team_col),
+    "Injuries by team": lambda: section_team_counts(snap, choices, team_col),
+    "Month × Team heatmap": lambda: section_heatmap(snap, choices, team_col),
+    "Age vs drop / rating": lambda: section_age(snap, choices, name_col, team_col),
+    "Comeback leaderboard": lambda: section_leaderboard(snap, choices, name_col),
+    "Availability": lambda: section_availability(snap, choices, name_col, team_col),
+}
+section = st.radio("Section", list(SECTIONS), horizontal=True, label_visibility="collapsed")
+SECTIONS[section]()
 
-# ---------- VISUAL 2: Injury counts by team ----------
-st.subheader("Injury counts by team")
-if team_col and team_col in view.columns:
-    counts = view[team_col].value_counts().reset_index()
-    counts.columns = [team_col, 'injury_count']
-    fig2 = px.bar(counts, x=team_col, y='injury_count', title="Injury counts by team")
-    st.plotly_chart(fig2, use_container_width=True)
-else:
-    st.info("Team column not found (team/team_name).")
-
-# ---------- VISUAL 3: Heatmap month × team ----------
-st.subheader("Injury frequency — Month × Team (heatmap)")
-if 'injury_month' in view.columns and team_col:
-    heat = view.groupby(['injury_month', team_col]).size().reset_index(name='count')
-    pivot = heat.pivot(index=team_col, columns='injury_month', values='count').fillna(0)
-    pivot_long = pivot.reset_index().melt(id_vars=team_col, var_name='injury_month', value_name='count')
-    if pivot_long['count'].sum() > 0:
-        fig3 = px.density_heatmap(pivot_long, x='injury_month', y=team_col, z='count', title="Injury frequency by month & team")
-        st.plotly_chart(fig3, use_container_width=True)
-    else:
-        st.info("No injury counts to show in heatmap (filtered data).")
-else:
-    st.info("To show heatmap, need 'injury_month' and team column present.")
-
-# ---------- VISUAL 4: Age vs Performance Drop or Age vs Rating ----------
-st.subheader("Age vs performance drop / rating")
-if 'age' in view.columns and 'performance_drop_index' in view.columns and view.dropna(subset=['age','performance_drop_index']).shape[0] > 0:
-    sc = view.dropna(subset=['age','performance_drop_index'])
-    fig4 = px.scatter(sc, x='age', y='performance_drop_index', hover_data=[c for c in [name_col, team_col] if c in sc.columns], trendline='ols', title="Age vs performance drop")
-    st.plotly_chart(fig4, use_container_width=True)
-elif 'age' in view.columns and 'fifa_rating' in view.columns and view.dropna(subset=['age','fifa_rating']).shape[0] > 0:
-    sc = view.dropna(subset=['age','fifa_rating'])
-    fig4b = px.scatter(sc, x='age', y='fifa_rating', hover_data=[c for c in [name_col, team_col] if c in sc.columns], trendline='ols', title="Age vs FIFA rating")
-    st.plotly_chart(fig4b, use_container_width=True)
-else:
-    st.info("No valid data for age comparison (need 'age' plus 'performance_drop_index' or 'fifa_rating').")
-
-# ---------- VISUAL 5: Leaderboard (improvement) ----------
-st.subheader("Leaderboard — Best comebacks (avg_after − avg_before)")
-if 'avg_rating_before' in view.columns and 'avg_rating_after' in view.columns and name_col:
-    summary = view.groupby(name_col).agg({'avg_rating_before':'mean','avg_rating_after':'mean'}).reset_index()
-    summary['improvement'] = summary['avg_rating_after'] - summary['avg_rating_before']
-    top_improve = summary.sort_values('improvement', ascending=False).head(20)
-    st.dataframe(top_improve.round(3))
-else:
-    st.info("Comeback leaderboard requires 'avg_rating_before' and 'avg_rating_after' columns and a player name column.")
+if profiling:
+    timings = prof.frame()
+    perf_panel.caption(f"{len(timings)} stages, {timings.loc[timings['depth'] == 0, 'seconds'].sum() * 1000:.1f} ms total")
+    perf_panel.dataframe(timings.assign(ms=timings['seconds'] * 1000).drop(columns=['seconds', 'peak_mb']).round(2), hide_index=True)
+    cache = data.results.stats()
+    perf_panel.caption(f"Shared query cache: {cache['entries']} results, {cache['mb']:.2f} / {cache['budget_mb']:.0f} MB, "
+                       f"{cache['hits']} hits / {cache['misses']} misses, {cache['evictions']} evicted")
 
 st.markdown("---")
-st.caption("If a chart is empty, check the 'Column list (normalized)' above and the CSV content. Ask me to map any different column name if needed.")
+st.caption("If a chart is empty, check the column list (toggle above) and the CSV content. Ask me to map any different column name if needed.")
 
@@ -0,0 +1,217 @@
+# benchmark.py
+"""
+Benchmark suite for the dashboard / EDA pipeline on synthetic data.
+
+Generates injuries CSVs with the exact cleaned-CSV schema (same headers,
+"N.A." gaps, realistic cardinalities) at any size, then times every stage
+separately: CSV parse, snapshot load, normalize, derive, filter, each visual's
+aggregation, the availability queries and each figure's serialization.
+
+Run:
+    python benchmark.py --sizes 1000,100000 --save bench_baseline.json
+    python benchmark.py --sizes 1000,100000 --compare bench_baseline.json
+--compare exits with status 1 when a stage is slower than baseline * --tolerance.
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from charts import adaptive_scatter, count_heatmap
+from cube import build_cube, rollup
+from features import MATCHES_PER_PHASE, PHASES, build_features, normalize_columns
+from filter_index import FilterIndex
+from injury_data import load_injuries, read_injuries_csv
+from intervals import AbsenceIndex
+from trendline import add_trendlines, fit_lines
+
+RESULTS = np.array(["win", "draw", "lose"])
+POSITIONS = ["Goalkeeper", "Center Back", "Left Back", "Right Back", "Defensive Midfielder", "Central Midfielder",
+             "Attacking Midfielder", "Left Midfielder", "Right Midfielder", "Left Winger", "Right Winger",
+             "Second Striker", "Center Forward", "Wing Back"]
+MONTHS = np.array(["January", "February", "March", "April", "May", "June", "July", "August", "September",
+                   "October", "November", "December"])
+
+# ---------- synthetic data ----------
+def synthetic_injuries(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Raw-schema injuries frame (original CSV headers) with roughly the sample's gap rates."""
+    rng = np.random.default_rng(seed)
+    n_teams = max(8, min(200, n_rows // 80))
+    n_players = max(20, n_rows // 3)
+    teams = np.array([f"Team {i:03d}" for i in range(n_teams)])
+    players = np.array([f"Player {i:07d}" for i in range(n_players)])
+    injuries = np.array([f"Injury type {i:03d}" for i in range(140)])
+    seasons = np.array([f"{y}/{(y + 1) % 100:02d}" for y in range(2019, 2025)])
+
+    start = np.datetime64("2019-07-01") + rng.integers(0, 5 * 365, n_rows).astype("timedelta64[D]")
+    back = start + rng.gamma(2.0, 20.0, n_rows).astype("timedelta64[D]")
+    no_date = rng.random(n_rows) < 0.13
+    out = {
+        "Player_Name": players[rng.integers(0, n_players, n_rows)],
+        "Team": teams[rng.integers(0, n_teams, n_rows)],
+        "Position": np.array(POSITIONS)[rng.integers(0, len(POSITIONS), n_rows)],
+        "Age": rng.integers(18, 40, n_rows),
+        # the season follows the injury date (July-June), as in the real data
+        "Season": np.where(no_date, seasons[rng.integers(0, len(seasons), n_rows)],
+                           seasons[np.clip(pd.to_datetime(start).year - (pd.to_datetime(start).month < 7) - 2019, 0, len(seasons) - 1)]),
+        "FIFA_Rating": rng.integers(65, 92, n_rows),
+        "Injury": injuries[rng.zipf(1.6, n_rows) % len(injuries)],
+        "Date of Injury": np.where(no_date, None, pd.to_datetime(start).strftime("%Y-%m-%d")),
+        "Date of return": np.where(no_date, None, pd.to_datetime(back).strftime("%Y-%m-%d")),
+    }
+    gd, rating = {}, {}
+    for phase, gap in zip(PHASES, (0.15, 0.3, 0.27)):
+        for m in range(1, MATCHES_PER_PHASE + 1):
+            prefix = f"Match{m}_{phase}"
+            missing = rng.random(n_rows) < gap
+            g = np.clip(np.round(rng.normal(0, 1.6, n_rows)), -6, 6)
+            out[f"{prefix}_Result"] = np.where(missing, "N.A.", RESULTS[np.sign(g).astype(int) * -1 + 1])
+            out[f"{prefix}_Opposition"] = np.where(missing, "N.A.", teams[rng.integers(0, n_teams, n_rows)])
+            out[f"{prefix}_GD"] = np.where(missing, np.nan, g)
+            gd[(phase, m)] = out[f"{prefix}_GD"]
+            if phase != "missed_match":
+                r = np.round(np.clip(rng.normal(6.6, 0.7, n_rows), 3, 10), 1)
+                out[f"{prefix}_Player_rating"] = np.where(missing, np.nan, r)
+                rating[(phase, m)] = out[f"{prefix}_Player_rating"]
+    out["Injury_Month"] = np.where(no_date, None, MONTHS[pd.to_datetime(start).month - 1])
+    out["Injury_Year"] = np.where(no_date, np.nan, pd.to_datetime(start).year)
+    df = pd.DataFrame(out)
+    # the cleaned CSV carries the derived columns too; build_features recomputes the same values
+    derived = build_features(df)
+    for c in ["avg_rating_before", "avg_rating_after", "rating_change", "team_gd_before", "team_gd_missed",
+              "performance_drop_index"]:
+        df[c] = derived[c].to_numpy()
+    return df
+
+# ---------- timing ----------
+def timed(results: dict, name: str, fn, repeat: int = 1):
+    best, value = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        value = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    results[name] = best
+    return value
+
+def bench_size(n_rows: int, workdir: Path, repeat: int = 1) -> dict:
+    import plotly.express as px
+    import step3_eda_fixed as step3
+
+    res = {}
+    csv_path = workdir / f"injuries_{n_rows}.csv"
+    synthetic_injuries(n_rows).to_csv(csv_path, index=False)
+
+    # load / normalize / derive
+    raw = timed(res, "load.read_csv", lambda: read_injuries_csv(csv_path), repeat)
+    timed(res, "normalize", lambda: normalize_columns(raw), repeat)
+    df = timed(res, "derive.build_features", lambda: build_features(raw), repeat)
+    load_injuries(csv_path)  # writes the snapshot
+    timed(res, "load.snapshot", lambda: load_injuries(csv_path), repeat)
+
+    # filter
+    dims = ['player_name', 'team', 'season', 'injury_month']
+    index = timed(res, "filter.build_index", lambda: FilterIndex(df, dims), repeat)
+    team = index.options('team')[0]
+    season = index.options('season')[0]
+    choices = {'team': team, 'season': season}
+    view = timed(res, "filter.take", lambda: index.take(df, choices), repeat)
+
+    # aggregations (cube rollups, as in app.py)
+    measures = ['performance_drop_index', 'avg_rating_before', 'avg_rating_after', 'fifa_rating']
+    cube = timed(res, "agg.build_cube", lambda: build_cube(df, dims, measures), repeat)
+    coarse = timed(res, "agg.build_coarse_cube", lambda: build_cube(df, dims[1:], measures), repeat)
+    drops = timed(res, "agg.v1_top_drops", lambda: rollup(cube, ['player_name'], choices)
+                  .nlargest(15, 'performance_drop_index_mean'), repeat)
+    timed(res, "agg.total", lambda: rollup(coarse, [], choices), repeat)
+    counts = timed(res, "agg.v2_team_counts", lambda: rollup(coarse, ['team'], {'season': season}), repeat)
+    heat = timed(res, "agg.v3_heatmap", lambda: rollup(coarse, ['injury_month', 'team'], {'season': season}), repeat)
+    sc = view.dropna(subset=['age', 'performance_drop_index'])
+    fits = timed(res, "agg.v4_trendline", lambda: fit_lines(sc['age'], sc['performance_drop_index'], sc['team']), repeat)
+    timed(res, "agg.v5_leaderboard", lambda: rollup(cube, ['player_name'], {'season': season}), repeat)
+
+    # availability (interval index over injury periods)
+    absences = timed(res, "intervals.build", lambda: AbsenceIndex(df, 'team'), repeat)
+    days = pd.date_range("2019-08-01", "2024-05-31", freq="D")
+    timed(res, "intervals.out_on", lambda: [absences.out_on(d, team) for d in days[::7]], repeat)
+    timed(res, "intervals.count_on", lambda: absences.count_on(days), repeat)
+    timed(res, "intervals.weekly", lambda: absences.weekly(), repeat)
+
+    # figure serialization
+    timed(res, "fig.v1_bar", lambda: px.bar(drops, x='player_name', y='performance_drop_index_mean').to_json(), repeat)
+    timed(res, "fig.v2_bar", lambda: px.bar(counts, x='team', y='n').to_json(), repeat)
+    timed(res, "fig.v3_heatmap", lambda: count_heatmap(heat, x='injury_month', y='team', z='n').to_json(), repeat)
+    # full (unfiltered) scatter so large sizes exercise the WebGL / binned paths
+    full = df.dropna(subset=['age', 'performance_drop_index'])
+    timed(res, "fig.v4_scatter", lambda: add_trendlines(adaptive_scatter(full, x='age', y='performance_drop_index'), fits).to_json(), repeat)
+
+    # step3 outputs (serial, output silenced)
+    out_dir = workdir / f"eda_{n_rows}"
+    out_dir.mkdir(exist_ok=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for task in step3.TASKS:
+            data = step3.task_input(df, task)
+            timed(res, f"step3.{task.name}", lambda: task.run(data, out_dir), repeat)
+    return res
+
+# ---------- baseline compare ----------
+def compare(current: dict, baseline: dict, tolerance: float, floor: float) -> list:
+    """Stages slower than baseline * tolerance (stages under `floor` seconds in both runs are ignored)."""
+    failures = []
+    for size, stages in current.items():
+        for stage, t in stages.items():
+            base = baseline.get(size, {}).get(stage)
+            if base is None or max(base, t) < floor:
+                continue
+            if t > base * tolerance:
+                failures.append(f"{size} rows / {stage}: {t:.4f}s vs baseline {base:.4f}s (x{t / base:.2f})")
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the injuries pipeline on synthetic data")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated row counts (up to 10M)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage, best time is kept")
+    parser.add_argument("--save", help="write results as a JSON baseline")
+    parser.add_argument("--compare", help="compare against a JSON baseline, exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed slowdown factor (default 1.5)")
+    parser.add_argument("--floor", type=float, default=0.005, help="ignore stages faster than this many seconds")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            print(f"--- {n} rows ---")
+            results[str(n)] = bench_size(n, Path(tmp), args.repeat)
+            for stage, t in results[str(n)].items():
+                print(f"{stage:<40s} {t * 1000:10.2f} ms")
+
+    payload = {
+        "meta": {"python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+                 "machine": platform.machine(), "repeat": args.repeat},
+        "results": results,
+    }
+    if args.save:
+        Path(args.save).write_text(json.dumps(payload, indent=2))
+        print("Saved baseline:", args.save)
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())["results"]
+        failures = compare(results, baseline, args.tolerance, args.floor)
+        if failures:
+            print("\nREGRESSIONS:")
+            for f in failures:
+                print(" -", f)
+            return 1
+        print("\nNo regressions against", args.compare)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+# charts.py
+"""
+Size-adaptive figures for the scatter and heatmap visuals.
+
+The age scatter sends raw points only while they are few. Above
+SCATTER_WEBGL_POINTS it switches to WebGL markers. Above SCATTER_BIN_POINTS
+the points are pre-binned with np.histogram2d and drawn as a count grid, so
+the payload stays bounded whatever the row count. grid_counts() bins on a fixed
+grid instead, so counts from separate chunks can be added up. The month x team
+heatmap is drawn straight from its count matrix instead of re-binning a long frame.
+"""
+import numpy as np
+import pandas as pd
+
+SCATTER_WEBGL_POINTS = 20_000
+SCATTER_BIN_POINTS = 200_000
+MAX_BINS = 80
+
+def _bins(values: np.ndarray) -> np.ndarray:
+    lo, hi = float(np.min(values)), float(np.max(values))
+    if hi <= lo:
+        return np.array([lo - 0.5, lo + 0.5])
+    if np.all(values == np.round(values)) and hi - lo < MAX_BINS:
+        # integer data (e.g. age): one bin per value
+        return np.arange(lo - 0.5, hi + 1.5)
+    return np.linspace(lo, hi, MAX_BINS + 1)
+
+def binned_counts(x, y):
+    """2-D histogram of (x, y): (counts[y_bin, x_bin], x_centers, y_centers)."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    x_edges, y_edges = _bins(x), _bins(y)
+    counts, _, _ = np.histogram2d(x, y, bins=(x_edges, y_edges))
+    return counts.T, (x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2
+
+def adaptive_scatter(df: pd.DataFrame, x, y, color=None, hover_data=None, title=None):
+    """px.scatter for small data, WebGL for medium, a binned count grid for large data."""
+    n = len(df)
+    if n <= SCATTER_BIN_POINTS:
+        import plotly.express as px
+        mode = "svg" if n <= SCATTER_WEBGL_POINTS else "webgl"
+        return px.scatter(df, x=x, y=y, color=color, hover_data=hover_data, title=title, render_mode=mode)
+
+    counts, xc, yc = binned_counts(df[x], df[y])
+    return binned_figure(counts, xc, yc, x, y, title)
+
+def binned_figure(counts, x_centers, y_centers, x, y, title=None):
+    """Scatter replacement drawn from a pre-binned count grid (counts[y_bin, x_bin])."""
+    import plotly.graph_objects as go
+    counts = np.asarray(counts, dtype=np.float64)
+    fig = go.Figure(go.Heatmap(
+        x=x_centers, y=y_centers, z=np.where(counts > 0, counts, np.nan), colorscale="Blues", colorbar=dict(title="points"),
+        hovertemplate=f"{x}=%{{x:.2f}}<br>{y}=%{{y:.2f}}<br>points=%{{z}}<extra></extra>",
+    ))
+    n = int(counts.sum())
+    fig.update_layout(title=f"{title} — {n:,} points binned" if title else None, xaxis_title=x, yaxis_title=y)
+    return fig
+
+def grid_counts(x, y, x_step: float, y_step: float) -> pd.Series:
+    """Point counts per fixed-size (x, y) cell, keyed by integer cell numbers; add() merges two of them."""
+    cells = pd.DataFrame({
+        "x": np.round(np.asarray(x, dtype=np.float64) / x_step).astype(np.int64),
+        "y": np.round(np.asarray(y, dtype=np.float64) / y_step).astype(np.int64),
+    })
+    return cells.value_counts(sort=False)
+
+def grid_matrix(cells: pd.Series, x_step: float, y_step: float):
+    """grid_counts() as (counts[y_bin, x_bin], x_centers, y_centers) for binned_figure()."""
+    xi = cells.index.get_level_values(0).to_numpy()
+    yi = cells.index.get_level_values(1).to_numpy()
+    x0, y0 = xi.min(), yi.min()
+    counts = np.zeros((yi.max() - y0 + 1, xi.max() - x0 + 1))
+    np.add.at(counts, (yi - y0, xi - x0), cells.to_numpy())
+    return counts, np.arange(x0, xi.max() + 1) * x_step, np.arange(y0, yi.max() + 1) * y_step
+
+def count_heatmap(counts: pd.DataFrame, x, y, z="count", title=None):
+    """Heatmap drawn directly from a long (x, y, count) frame; cells without rows show as 0."""
+    import plotly.graph_objects as go
+    matrix = counts.pivot_table(index=y, columns=x, values=z, aggfunc="sum", fill_value=0, observed=True)
+    fig = go.Figure(go.Heatmap(
+        x=[str(c) for c in matrix.columns], y=[str(r) for r in matrix.index], z=matrix.to_numpy(),
+        colorscale="Viridis", colorbar=dict(title=z),
+        hovertemplate=f"{x}=%{{x}}<br>{y}=%{{y}}<br>{z}=%{{z}}<extra></extra>",
+    ))
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y)
+    return fig
@@ -0,0 +1,3 @@
+# conftest.py
+# Lets a plain `pytest` from the repo root import the top-level modules (injury_data, ...):
+# pytest puts the directory of a rootdir conftest.py on sys.path.
@@ -0,0 +1,106 @@
+# cube.py
+"""
+Materialized aggregate cube behind the dashboard visuals.
+
+build_cube() stores additive partial aggregates (count, sum, sum of squares,
+min, max) of a few measures for every cell of its dims. rollup() answers a
+chart by filtering the cube cells that match the current sidebar filters and
+re-aggregating them, without touching raw rows.
+
+A player-level cube has roughly one cell per row, so the dashboard also keeps a
+coarse team x season x injury_month cube. covering_cube() picks the smallest
+cube that has every grouped and filtered dim: the coarse one unless a player
+is involved.
+"""
+import numpy as np
+import pandas as pd
+
+from perf import stage
+
+STATS = ("count", "sum", "sumsq", "min", "max")
+
+def build_cube(df: pd.DataFrame, dims, measures) -> pd.DataFrame:
+    dims = [d for d in dims if d and d in df.columns]
+    measures = [m for m in measures if m in df.columns]
+    work = df[dims].copy()
+    for m in measures:
+        values = pd.to_numeric(df[m], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        work[m] = values
+        work[f"{m}__sq"] = values * values
+    # dropna=False: a missing player name must still count towards its team, month, ...
+    g = work.groupby(dims, observed=True, dropna=False, sort=False)
+    parts = {"n": g.size()}
+    for m in measures:
+        parts[f"{m}_count"] = g[m].count()
+        parts[f"{m}_sum"] = g[m].sum()
+        parts[f"{m}_sumsq"] = g[f"{m}__sq"].sum()
+        parts[f"{m}_min"] = g[m].min()
+        parts[f"{m}_max"] = g[m].max()
+    return pd.DataFrame(parts).reset_index()
+
+def cube_measures(cube: pd.DataFrame):
+    return [c[:-len("_count")] for c in cube.columns if c.endswith("_count")]
+
+def cube_dims(cube: pd.DataFrame):
+    measures = cube_measures(cube)
+    stats = {"n"} | {f"{m}_{s}" for m in measures for s in STATS}
+    return [c for c in cube.columns if c not in stats]
+
+def covering_cube(cubes, by, filters: dict = None) -> pd.DataFrame:
+    """Smallest of `cubes` whose dims cover `by` and every active filter (unknown dims are ignored)."""
+    known = set().union(*(cube_dims(c) for c in cubes))
+    need = {b for b in by if b} | {c for c, v in (filters or {}).items() if c is not None and v is not None and v != "All"}
+    need &= known
+    fits = [c for c in cubes if need <= set(cube_dims(c))]
+    return min(fits, key=len) if fits else max(cubes, key=len)
+
+def _how(measures):
+    how = {"n": "sum"}
+    for m in measures:
+        how.update({f"{m}_count": "sum", f"{m}_sum": "sum", f"{m}_sumsq": "sum",
+                    f"{m}_min": "min", f"{m}_max": "max"})
+    return how
+
+def merge_cubes(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    """Combine two cubes over the same dims/measures (e.g. existing rows + appended rows)."""
+    dims = cube_dims(a)
+    both = pd.concat([a, b], ignore_index=True)
+    g = both.groupby(dims, observed=True, dropna=False, sort=False)
+    return g.agg(_how(cube_measures(a))).reset_index()
+
+def select(cube: pd.DataFrame, filters: dict) -> pd.DataFrame:
+    """Cube cells matching every {dim: value}; None / "All" / unknown dims are ignored."""
+    mask = np.ones(len(cube), dtype=bool)
+    for col, value in filters.items():
+        if col in cube.columns and value is not None and value != "All":
+            mask &= (cube[col] == value).to_numpy(dtype=bool, na_value=False)
+    return cube[mask]
+
+def rollup(cube: pd.DataFrame, by, filters: dict = None) -> pd.DataFrame:
+    """Re-aggregate the selected cells by `by` (may be empty for a grand total).
+
+    Returns n plus, per measure, count / sum / min / max / mean / std.
+    Rows whose `by` keys are missing are dropped, like a plain groupby.
+    """
+    with stage(f"agg.rollup[{','.join(b for b in by if b)}]") as rec:
+        out = _rollup(cube, by, filters)
+        rec["rows"] = len(out)
+    return out
+
+def _rollup(cube, by, filters):
+    cells = select(cube, filters or {})
+    by = [b for b in by if b]
+    measures = cube_measures(cube)
+    how = _how(measures)
+    if by:
+        out = cells.groupby(by, observed=True).agg(how).reset_index()
+    else:
+        out = cells.agg(how).to_frame().T.astype(float)
+    for m in measures:
+        count = out[f"{m}_count"]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = out[f"{m}_sum"] / count.where(count > 0)
+            var = (out[f"{m}_sumsq"] - count * mean * mean) / (count - 1).where(count > 1)
+        out[f"{m}_mean"] = mean
+        out[f"{m}_std"] = np.sqrt(var.clip(lower=0))
+    return out
@@ -0,0 +1,135 @@
+# dataset.py
+"""
+Live, in-process view of the injuries CSV for the dashboard.
+
+InjuryDataset holds the cleaned frame together with the filter index, the
+aggregate cubes (all dims, plus a coarse one without the player dims) and the
+absence interval index built on it. refresh() picks up
+changes to the CSV: appended rows are parsed once and merged into the frame,
+the index and the cube; only a rewrite of earlier rows triggers a full rebuild.
+The interval index is re-sorted on every change (it only holds a few arrays).
+
+One InjuryDataset is shared by every session of the process. Readers take a
+Snapshot: an immutable (frame, index, cube, absences) set that refresh()
+replaces in one assignment, so a session never sees the frame of one version
+with the index of another. Snapshot.query() runs a query function through the
+shared QueryCache, keyed by the function, the filters and the snapshot contents
+(bytes consumed, row count, prefix hash), so sessions with the same filters
+reuse one small result instead of each recomputing it.
+"""
+import threading
+from typing import NamedTuple
+
+import pandas as pd
+
+from cube import build_cube, covering_cube, merge_cubes, rollup
+from filter_index import FilterIndex
+from injury_data import CONTENT_KEYS, fully_consumed, ingest, snapshot_key
+from intervals import AbsenceIndex
+from perf import stage
+from query_cache import QueryCache
+
+def _freeze(value):
+    """Hashable form of query arguments (dicts / lists become sorted / plain tuples)."""
+    if isinstance(value, dict):
+        return tuple(sorted(((str(k), _freeze(v)) for k, v in value.items())))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+class Snapshot(NamedTuple):
+    frame: pd.DataFrame
+    index: FilterIndex
+    cube: pd.DataFrame          # every dim, ~one cell per row
+    coarse: pd.DataFrame        # coarse dims only (no player), a few cells per team and month
+    absences: AbsenceIndex
+    meta: dict
+    results: QueryCache
+
+    @property
+    def key(self):
+        return {k: self.meta[k] for k in ("source", "size", "mtime_ns", "schema_version")}
+
+    def rollup(self, by, choices):
+        """cube.rollup() on the smallest cube that covers `by` and the active filters."""
+        return rollup(covering_cube([self.coarse, self.cube], by, choices), by, choices)
+
+    def query(self, fn, choices, *args):
+        """fn(snapshot, choices, *args), cached across sessions; treat the result as read-only."""
+        # keyed on what the snapshot holds, not on the file stat: a settled last line adds a row
+        # without changing size / mtime, and must not be served results of the shorter frame
+        key = (fn.__module__, fn.__qualname__, _freeze(choices), _freeze(args),
+               *(self.meta[k] for k in CONTENT_KEYS))
+        with stage(f"query.{fn.__name__}"):
+            return self.results.get(key, lambda: fn(self, choices, *args))
+
+class InjuryDataset:
+    def __init__(self, csv_path, dims, measures, coarse_dims=(), absence_groups=('team', 'team_name'), cache_mb=64):
+        self.csv_path = csv_path
+        self.dims = [d for d in dims if d]
+        self.coarse_dims = [d for d in coarse_dims if d] or self.dims   # no coarse dims: both cubes are the full one
+        self.measures = list(measures)
+        self.absence_groups = absence_groups    # first present column groups the absences
+        self.results = QueryCache(cache_mb)
+        self._lock = threading.Lock()
+        self._ingest = None
+        self._snap = None
+        self.refresh()
+
+    def snapshot(self) -> Snapshot:
+        return self._snap
+
+    @property
+    def frame(self):
+        return self._snap.frame
+
+    @property
+    def index(self):
+        return self._snap.index
+
+    @property
+    def cube(self):
+        return self._snap.cube
+
+    @property
+    def absences(self):
+        return self._snap.absences
+
+    @property
+    def key(self):
+        return self._snap.key
+
+    def refresh(self) -> str:
+        """Sync with the CSV; returns the ingest mode ("snapshot", "append" or "full")."""
+        with self._lock:
+            if self._snap is not None and snapshot_key(self.csv_path) == self.key and fully_consumed(self._snap.meta):
+                return "snapshot"
+            with stage("dataset.ingest") as rec:
+                result = ingest(self.csv_path, base=self._ingest)
+                rec["rows"] = len(result.frame)
+            old = self._snap
+            with stage(f"dataset.index+cube ({result.mode})"):
+                if result.mode == "append" and old is not None:
+                    # extend a copy: sessions still reading the old snapshot keep a consistent index
+                    index = old.index.copy()
+                    index.extend(result.appended)
+                    cube = merge_cubes(old.cube, build_cube(result.appended, self.dims, self.measures))
+                    coarse = merge_cubes(old.coarse, build_cube(result.appended, self.coarse_dims, self.measures))
+                elif result.mode == "full" or old is None:
+                    index = FilterIndex(result.frame, self.dims)
+                    cube = build_cube(result.frame, self.dims, self.measures)
+                    coarse = build_cube(result.frame, self.coarse_dims, self.measures)
+                else:
+                    index, cube, coarse = old.index, old.cube, old.coarse
+            if old is not None and result.mode == "snapshot":
+                absences = old.absences
+            else:
+                with stage("dataset.absences", rows=len(result.frame)):
+                    group = next((c for c in self.absence_groups if c in result.frame.columns), None)
+                    absences = AbsenceIndex(result.frame, group)
+            self._ingest = result
+            self._snap = Snapshot(result.frame, index, cube, coarse, absences, result.meta, self.results)
+            if result.mode != "snapshot":
+                # results of the old version can no longer be hit
+                self.results.clear()
+            return result.mode
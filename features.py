@@ -0,0 +1,90 @@
+# features.py
+"""
+Feature pipeline shared by app.py and step3_eda_fixed.py.
+
+Driven by the declared match-window schema below: each injury row carries
+3 matches before the injury, 3 missed matches and 3 matches after the return.
+build_features() normalizes the raw frame and derives every metric from those
+blocks in one vectorized NumPy pass, so both entry points see the same columns.
+"""
+import numpy as np
+import pandas as pd
+
+# ---------- declared schema (normalized names) ----------
+PHASES = ["before_injury", "missed_match", "after_injury"]
+MATCHES_PER_PHASE = 3
+RATED_PHASES = ["before_injury", "after_injury"]  # missed matches have no player rating
+DATE_COLUMNS = ["date_of_injury", "date_of_return"]
+NUMERIC_COLUMNS = ["age", "fifa_rating", "injury_year"]
+
+def match_column(match: int, phase: str, field: str) -> str:
+    return f"match{match}_{phase}_{field}"
+
+# ---------- helpers ----------
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
+    return df
+
+def has_dates(df: pd.DataFrame) -> bool:
+    return all(c in df.columns for c in DATE_COLUMNS)
+
+def _sources(field: str, phases) -> list:
+    return [match_column(m + 1, phase, field) for phase in phases for m in range(MATCHES_PER_PHASE)]
+
+def _block(df: pd.DataFrame, field: str, phases) -> np.ndarray:
+    """(rows, phases, matches) float32 array of one numeric match field; absent columns are NaN."""
+    out = np.full((len(df), len(phases), MATCHES_PER_PHASE), np.nan, dtype=np.float32)
+    for i, phase in enumerate(phases):
+        for m in range(MATCHES_PER_PHASE):
+            c = match_column(m + 1, phase, field)
+            if c in df.columns:
+                out[:, i, m] = pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=np.float32, na_value=np.nan)
+    return out
+
+def _nanmean_last(a: np.ndarray) -> np.ndarray:
+    # np.nanmean without the "mean of empty slice" warning for all-NaN windows
+    valid = ~np.isnan(a)
+    n = valid.sum(axis=-1)
+    total = np.where(valid, a, 0).sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(n > 0, total / n, np.nan).astype(np.float32)
+
+# ---------- pipeline ----------
+def build_features(raw: pd.DataFrame) -> pd.DataFrame:
+    df = normalize_columns(raw)
+    for c in DATE_COLUMNS:
+        if c in df.columns and not pd.api.types.is_datetime64_any_dtype(df[c]):
+            df[c] = pd.to_datetime(df[c], errors="coerce")
+    for c in NUMERIC_COLUMNS:
+        if c in df.columns and not pd.api.types.is_numeric_dtype(df[c]):
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+
+    # one pass over the window arrays: means per phase, then the differences
+    gd_mean = _nanmean_last(_block(df, "gd", PHASES))
+    rating_mean = _nanmean_last(_block(df, "player_rating", RATED_PHASES))
+    derived = {
+        "avg_rating_before": (rating_mean[:, 0], _sources("player_rating", ["before_injury"])),
+        "avg_rating_after": (rating_mean[:, 1], _sources("player_rating", ["after_injury"])),
+        "team_gd_before": (gd_mean[:, 0], _sources("gd", ["before_injury"])),
+        "team_gd_missed": (gd_mean[:, 1], _sources("gd", ["missed_match"])),
+        "performance_drop_index": (gd_mean[:, 0] - gd_mean[:, 1], _sources("gd", ["before_injury", "missed_match"])),
+    }
+    for c, (values, sources) in derived.items():
+        # a CSV may ship the derived column without the match blocks: keep it then
+        if c not in df.columns or any(s in df.columns for s in sources):
+            df[c] = values
+        elif not pd.api.types.is_numeric_dtype(df[c]):
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+    if "rating_change" not in df.columns or any(s in df.columns for s in _sources("player_rating", RATED_PHASES)):
+        df["rating_change"] = df["avg_rating_after"] - df["avg_rating_before"]
+
+    if has_dates(df):
+        days = (df["date_of_return"] - df["date_of_injury"]).dt.days
+        df["recovery_days"] = days.astype("Int16")
+    if "date_of_injury" in df.columns:
+        # "YYYY-MM" keeps months in chronological order; missing dates stay missing
+        df["injury_month"] = df["date_of_injury"].dt.strftime("%Y-%m").astype("category")
+    elif "injury_month" not in df.columns:
+        df["injury_month"] = pd.NA
+    return df
@@ -0,0 +1,76 @@
+# filter_index.py
+"""
+Inverted index for the dashboard's sidebar filters.
+
+For every filter column (player, team, season, injury month) we keep a map
+value -> sorted int64 array of row positions. A filtered view is the
+intersection of the selected arrays, taken from the frame in one go instead of
+copying the whole frame and applying one boolean mask per filter.
+"""
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from perf import stage
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+class FilterIndex:
+    def __init__(self, df: pd.DataFrame, columns):
+        self.n_rows = len(df)
+        self.columns = [c for c in columns if c in df.columns]
+        self.postings = {}
+        self._options = {}
+        for c in self.columns:
+            self.postings[c] = {}
+        self._add(df, 0)
+
+    def _add(self, df: pd.DataFrame, start: int):
+        for c in self.columns:
+            # groupby(...).indices gives {value: sorted positions}, NaN keys dropped
+            idx = df.groupby(c, sort=False, observed=True).indices
+            postings = self.postings[c]
+            for k, v in idx.items():
+                v = np.asarray(v, dtype=np.int64) + start
+                # appended rows always sit after the existing ones, so this stays sorted
+                postings[k] = np.concatenate([postings[k], v]) if k in postings else v
+            self._options[c] = sorted(postings)
+
+    def copy(self) -> "FilterIndex":
+        """Independent copy to extend(); the position arrays are shared, _add() never modifies them in place."""
+        new = object.__new__(FilterIndex)
+        new.n_rows = self.n_rows
+        new.columns = list(self.columns)
+        new.postings = {c: dict(p) for c, p in self.postings.items()}
+        new._options = dict(self._options)
+        return new
+
+    def extend(self, new_rows: pd.DataFrame):
+        """Index rows appended to the end of the indexed frame."""
+        self._add(new_rows, self.n_rows)
+        self.n_rows += len(new_rows)
+
+    def options(self, col):
+        """Sorted distinct values of a column (same as sorted(df[col].dropna().unique()))."""
+        return list(self._options.get(col, []))
+
+    def positions(self, choices: dict):
+        """Row positions matching every {column: value} in choices, or None for "all rows".
+
+        Columns that are not indexed, and values of None / "All", are ignored.
+        """
+        selected = [self.postings[c].get(v, _EMPTY) for c, v in choices.items()
+                    if c in self.postings and v is not None and v != "All"]
+        if not selected:
+            return None
+        # intersect smallest first so every step works on the shortest arrays
+        selected.sort(key=len)
+        return reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), selected)
+
+    def take(self, df: pd.DataFrame, choices: dict) -> pd.DataFrame:
+        with stage("filter.take") as rec:
+            pos = self.positions(choices)
+            view = df if pos is None else df.take(pos)
+            rec["rows"] = len(view)
+        return view
@@ -0,0 +1,270 @@
+# injury_data.py
+"""
+Loading + cleaning of the injuries CSV, with a persistent columnar snapshot.
+
+The first load parses and cleans the CSV, then saves the typed frame as Parquet
+in .injury_cache/ next to the CSV. Later loads (reruns, new processes) read the
+snapshot directly as long as the CSV's path, size, mtime and SCHEMA_VERSION
+still match. When rows were only appended to the CSV, just the new bytes are
+parsed and merged into the snapshot. Bytes after the last newline may be a row
+that is still being written, so they are left for a later load until the file
+has been unchanged for SETTLE_SECONDS.
+
+The JSON meta file is only a fast index: the Parquet file carries its own copy
+of the meta (in df.attrs), and a snapshot whose copy disagrees with the JSON
+(e.g. two processes writing at once) is rebuilt instead of being appended to.
+Both files are written to per-process temp names and renamed into place.
+"""
+import hashlib
+import io
+import json
+import os
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from features import MATCHES_PER_PHASE, PHASES, build_features
+from perf import stage
+
+# bump whenever the schema or features.build_features() changes its output, so old snapshots are ignored
+SCHEMA_VERSION = 3
+CACHE_DIR_NAME = ".injury_cache"
+
+# ---------- explicit CSV schema ----------
+# Keys are the raw CSV headers. Repeated low-cardinality strings become
+# categoricals, ratings / GD become float32 and small integers nullable ints, so
+# nothing falls back to Python objects. "N.A." is read as missing at parse time.
+NA_VALUES = ["N.A."]
+DATE_COLUMNS = ["Date of Injury", "Date of return"]
+MATCH_BLOCKS = [(m, phase) for phase in PHASES for m in range(1, MATCHES_PER_PHASE + 1)]
+
+CSV_DTYPES = {
+    "Player_Name": "string",
+    "Team": "category",
+    "Position": "category",
+    "Age": "Int8",
+    "Season": "category",
+    "FIFA_Rating": "Int8",
+    "Injury": "category",
+    "Injury_Month": "category",
+    "Injury_Year": "Int16",
+}
+for _m, _phase in MATCH_BLOCKS:
+    _prefix = f"Match{_m}_{_phase}"
+    CSV_DTYPES[f"{_prefix}_Result"] = "category"
+    CSV_DTYPES[f"{_prefix}_Opposition"] = "category"
+    CSV_DTYPES[f"{_prefix}_GD"] = "float32"
+    if _phase != "missed_match":
+        CSV_DTYPES[f"{_prefix}_Player_rating"] = "float32"
+for _c in ["avg_rating_before", "avg_rating_after", "rating_change", "team_gd_before", "team_gd_missed",
+           "performance_drop_index"]:
+    CSV_DTYPES[_c] = "float32"
+
+def read_injuries_csv(csv_path, **kwargs):
+    """pd.read_csv with the explicit schema above (extra kwargs, e.g. chunksize, pass through)."""
+    return pd.read_csv(csv_path, dtype=CSV_DTYPES, na_values=NA_VALUES, parse_dates=DATE_COLUMNS, **kwargs)
+
+def memory_report(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-column dtype and in-memory size (deep), largest first, with a TOTAL row."""
+    usage = df.memory_usage(index=False, deep=True)
+    report = pd.DataFrame({
+        "column": usage.index,
+        "dtype": [str(df[c].dtype) for c in usage.index],
+        "bytes": usage.values,
+    }).sort_values("bytes", ascending=False, ignore_index=True)
+    total = pd.DataFrame({"column": ["TOTAL"], "dtype": [""], "bytes": [int(usage.sum())]})
+    return pd.concat([report, total], ignore_index=True)
+
+# ---------- snapshot cache + incremental ingestion ----------
+HASH_BLOCK = 1 << 20
+SETTLE_SECONDS = 2.0    # an unterminated last line older than this is a complete row, not a write in progress
+
+class Ingest(NamedTuple):
+    frame: pd.DataFrame
+    meta: dict
+    mode: str                                   # "snapshot" | "append" | "full"
+    appended: Optional[pd.DataFrame] = None     # only the new rows when mode == "append"
+
+def _snapshot_paths(csv_path: Path):
+    cache_dir = csv_path.parent / CACHE_DIR_NAME
+    tag = hashlib.sha1(str(csv_path).encode("utf-8")).hexdigest()[:10]
+    base = cache_dir / f"{csv_path.stem}-{tag}"
+    return cache_dir, base.with_suffix(".parquet"), base.with_suffix(".json")
+
+def snapshot_key(csv_path) -> dict:
+    """Identity of the CSV contents a snapshot was built from."""
+    p = Path(csv_path).resolve()
+    st = p.stat()
+    return {"source": str(p), "size": st.st_size, "mtime_ns": st.st_mtime_ns, "schema_version": SCHEMA_VERSION}
+
+def _same_key(meta: dict, key: dict) -> bool:
+    return meta is not None and all(meta.get(k) == v for k, v in key.items())
+
+def fully_consumed(meta: dict) -> bool:
+    """False while the CSV ends in a partial line that the snapshot has not taken yet."""
+    return meta.get("offset") == meta.get("size")
+
+def _complete_lines(data: bytes, settled: bool) -> bytes:
+    """data up to its last newline; an unterminated last line is only taken once the file has settled."""
+    if settled or data.endswith(b"\n"):
+        return data
+    return data[:data.rfind(b"\n") + 1]
+
+def _hash_prefix(f, length: int):
+    h = hashlib.sha1()
+    f.seek(0)
+    remaining = length
+    while remaining > 0:
+        block = f.read(min(HASH_BLOCK, remaining))
+        if not block:
+            break
+        h.update(block)
+        remaining -= len(block)
+    return h
+
+def _read_meta(meta_path: Path):
+    try:
+        return json.loads(meta_path.read_text())
+    except Exception:
+        return None
+
+# meta fields that describe the snapshot's contents (the rest is the CSV's size / mtime)
+CONTENT_KEYS = ("schema_version", "offset", "rows", "prefix_sha1")
+
+def _read_snapshot(data_path: Path, meta: dict):
+    try:
+        frame = pd.read_parquet(data_path)
+    except Exception:
+        # unreadable/partial snapshot -> rebuild from the CSV
+        return None
+    own = frame.attrs.pop("snapshot", None) or {}
+    frame.attrs.clear()
+    if len(frame) != meta.get("rows") or any(own.get(k) != meta.get(k) for k in CONTENT_KEYS):
+        # Parquet and JSON meta come from different writes -> rebuild rather than append to it
+        print(f"[WARN] Snapshot {data_path} does not match its meta; rebuilding")
+        return None
+    return frame
+
+def _tmp_path(path: Path) -> Path:
+    # per process: the app and a step3 run on the same CSV must not share a temp file
+    return path.with_name(f"{path.name}.{os.getpid()}.tmp")
+
+def _write_meta(cache_dir: Path, meta_path: Path, meta: dict) -> bool:
+    try:
+        cache_dir.mkdir(exist_ok=True)
+        tmp = _tmp_path(meta_path)
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, meta_path)
+        return True
+    except Exception as e:
+        # caching is best effort: a read-only folder must not break loading
+        print(f"[WARN] Could not write snapshot meta {meta_path}: {e}")
+        return False
+
+def _write_snapshot(df: pd.DataFrame, cache_dir: Path, data_path: Path, meta_path: Path, meta: dict):
+    try:
+        cache_dir.mkdir(exist_ok=True)
+        tmp = _tmp_path(data_path)
+        out = df.copy(deep=False)
+        out.attrs = {"snapshot": {k: meta[k] for k in CONTENT_KEYS}}
+        out.to_parquet(tmp, index=False)
+        os.replace(tmp, data_path)
+    except Exception as e:
+        # caching is best effort: a read-only folder or missing pyarrow must not break loading
+        print(f"[WARN] Could not write snapshot {data_path}: {e}")
+        return
+    _write_meta(cache_dir, meta_path, meta)
+
+def concat_frames(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """Row-append new to old, unioning categories so categoricals stay categorical."""
+    new = new.reindex(columns=old.columns)
+    for c in old.columns:
+        if isinstance(old[c].dtype, pd.CategoricalDtype) or isinstance(new[c].dtype, pd.CategoricalDtype):
+            # a side with no values (e.g. appended rows that are all "N.A.") has empty categories
+            # of another dtype, which union_categoricals rejects: union only the non-empty ones
+            parts = [p for p in (pd.Categorical(old[c]), pd.Categorical(new[c])) if len(p.categories)]
+            categories = union_categoricals(parts, sort_categories=True).categories if parts else pd.Categorical(old[c]).categories
+            old = old.assign(**{c: pd.Categorical(old[c], categories=categories)})
+            new = new.assign(**{c: pd.Categorical(new[c], categories=categories)})
+    return pd.concat([old, new], ignore_index=True)
+
+def _parse(header: bytes, body: bytes) -> pd.DataFrame:
+    with stage("load.read_csv") as rec:
+        raw = read_injuries_csv(io.BytesIO(header + body))
+        rec["rows"] = len(raw)
+    with stage("derive.build_features", rows=len(raw)):
+        return build_features(raw)
+
+def ingest(csv_path, use_cache: bool = True, base: Ingest = None) -> Ingest:
+    """Bring the cleaned frame up to date with the CSV.
+
+    - CSV unchanged since the snapshot / `base`: reuse it ("snapshot").
+    - Bytes only appended after the last consumed offset: parse and clean just
+      the new rows, append them ("append"). Ingest.appended holds those rows so
+      callers can update indexes and aggregates incrementally.
+    - Anything else (rewrite in the middle, truncation, schema bump): full rebuild ("full").
+    """
+    p = Path(csv_path)
+    if not p.exists():
+        raise FileNotFoundError(f"File not found: {csv_path}")
+    p = p.resolve()
+    key = snapshot_key(p)
+    cache_dir, data_path, meta_path = _snapshot_paths(p)
+
+    frame, meta = (base.frame, base.meta) if base is not None else (None, None)
+    if frame is None and use_cache:
+        meta = _read_meta(meta_path)
+        if meta is not None and meta.get("schema_version") == SCHEMA_VERSION and meta.get("source") == key["source"]:
+            with stage("load.snapshot") as rec:
+                frame = _read_snapshot(data_path, meta)
+                rec["rows"] = None if frame is None else len(frame)
+    if frame is not None and _same_key(meta, key) and fully_consumed(meta):
+        return Ingest(frame, meta, "snapshot")
+    settled = time.time() - key["mtime_ns"] / 1e9 >= SETTLE_SECONDS
+
+    with open(p, "rb") as f:
+        header = f.readline()
+        h = None
+        if frame is not None and meta.get("schema_version") == SCHEMA_VERSION \
+                and key["size"] >= meta.get("offset", -1) > 0 and meta.get("header") == header.decode("utf-8"):
+            with stage("load.hash_prefix"):
+                h = _hash_prefix(f, meta["offset"])
+            if h.hexdigest() != meta.get("prefix_sha1"):
+                h = None
+        if h is not None:
+            # bytes up to the old offset are unchanged -> only parse what was appended
+            tail = _complete_lines(f.read(key["size"] - meta["offset"]), settled)
+            h.update(tail)
+            consumed = meta["offset"] + len(tail)
+            appended = _parse(header, tail) if tail.strip() else None
+            if appended is not None and len(appended):
+                frame = concat_frames(frame, appended)
+                mode = "append"
+            else:
+                appended, mode = None, "snapshot"
+        else:
+            f.seek(0)
+            data = f.read(key["size"])
+            data = _complete_lines(data, settled) or data
+            h = hashlib.sha1(data)
+            consumed = len(data)
+            frame, appended, mode = _parse(b"", data), None, "full"
+    new_meta = dict(key, offset=consumed, rows=len(frame), header=header.decode("utf-8"), prefix_sha1=h.hexdigest())
+    if use_cache and mode == "snapshot" and all(meta.get(k) == new_meta[k] for k in CONTENT_KEYS):
+        # only the mtime moved: keep the Parquet file, refresh the key
+        _write_meta(cache_dir, meta_path, new_meta)
+    elif use_cache:
+        _write_snapshot(frame, cache_dir, data_path, meta_path, new_meta)
+    return Ingest(frame, new_meta, mode, appended)
+
+def load_injuries(csv_path, use_cache: bool = True) -> pd.DataFrame:
+    """Return the cleaned injuries frame, from the snapshot (plus any appended rows) when possible."""
+    return ingest(csv_path, use_cache).frame
+
+def iter_injuries(csv_path, chunksize: int):
+    """Cleaned frames of at most `chunksize` rows, for single passes over CSVs too large for memory."""
+    for raw in read_injuries_csv(csv_path, chunksize=chunksize):
+        yield build_features(raw)
@@ -0,0 +1,131 @@
+# intervals.py
+"""
+Interval index over injury absences (date_of_injury -> date_of_return).
+
+Every absence is the half-open day range [injury, return). Per team (and for
+all teams under the key None) we keep the absences sorted by start day, the
+end days sorted on their own, and the sorted durations. With those arrays:
+
+- "who is out on day D" = starts <= D < ends. searchsorted finds the
+  absences that started within the team's longest absence before D, and only
+  those are checked;
+- "how many are out" on any set of days = #(starts <= D) - #(ends <= D), two
+  searchsorted calls for the whole batch of days;
+- recovery-duration quantiles / shares are lookups in the sorted durations.
+
+Counts and duration lookups are O(log n) per day, so scrubbing across whole
+seasons stays instant.
+Rows without both dates, or with a return before the injury, are left out;
+same-day returns count as one day.
+"""
+import numpy as np
+import pandas as pd
+
+_EPOCH_MONDAY = 4   # 1970-01-05, the first Monday after the epoch, as a day number
+
+def to_day(value) -> int:
+    """Day number (days since 1970-01-01) of a date-like value."""
+    return int(np.datetime64(pd.Timestamp(value).date(), "D").astype(np.int64))
+
+def week_start(day):
+    """Day number of the Monday on or before `day` (scalar or array)."""
+    return day - (day - _EPOCH_MONDAY) % 7
+
+class _Absences:
+    def __init__(self, starts, ends, rows):
+        order = np.argsort(starts, kind="stable")
+        self.starts = starts[order]
+        self.ends = ends[order]
+        self.rows = rows[order]
+        self.ends_sorted = np.sort(ends)
+        self.durations = np.sort(ends - starts)
+        self.longest = int(self.durations[-1]) if len(self.durations) else 0
+
+    def covering(self, day: int) -> np.ndarray:
+        # an absence covering `day` started in (day - longest, day]
+        lo = np.searchsorted(self.starts, day - self.longest, side="right")
+        hi = np.searchsorted(self.starts, day, side="right")
+        hit = self.ends[lo:hi] > day
+        return self.rows[lo:hi][hit]
+
+    def count(self, days) -> np.ndarray:
+        return np.searchsorted(self.starts, days, side="right") - np.searchsorted(self.ends_sorted, days, side="right")
+
+    def overlapping(self, first, last) -> np.ndarray:
+        """Absences overlapping each day range [first, last)."""
+        return np.searchsorted(self.starts, last, side="left") - np.searchsorted(self.ends_sorted, first, side="right")
+
+class AbsenceIndex:
+    def __init__(self, df: pd.DataFrame, group_col=None, start_col="date_of_injury", end_col="date_of_return"):
+        self.group_col = group_col if group_col in df.columns else None
+        self.groups = {}
+        if start_col not in df.columns or end_col not in df.columns:
+            self.first_day = self.last_day = None
+            return
+        starts = df[start_col].to_numpy(dtype="datetime64[D]", na_value=np.datetime64("NaT")).astype(np.int64)
+        ends = df[end_col].to_numpy(dtype="datetime64[D]", na_value=np.datetime64("NaT")).astype(np.int64)
+        nat = np.iinfo(np.int64).min
+        ok = (starts != nat) & (ends != nat) & (ends >= starts)
+        rows = np.flatnonzero(ok)
+        starts, ends = starts[ok], np.maximum(ends[ok], starts[ok] + 1)
+        self.groups[None] = _Absences(starts, ends, rows)
+        self.first_day = int(starts.min()) if len(starts) else None
+        self.last_day = int(ends.max()) - 1 if len(ends) else None
+        if self.group_col is not None:
+            keys = df[self.group_col].iloc[rows].reset_index(drop=True)
+            for k, idx in keys.groupby(keys, sort=True, observed=True).indices.items():
+                self.groups[k] = _Absences(starts[idx], ends[idx], rows[idx])
+
+    def __len__(self):
+        return len(self.groups[None].rows) if None in self.groups else 0
+
+    def teams(self):
+        return [k for k in self.groups if k is not None]
+
+    def out_on(self, date, team=None) -> np.ndarray:
+        """Sorted row positions of the absences covering `date` (for one team, or all when team is None)."""
+        g = self.groups.get(team)
+        return np.empty(0, dtype=np.int64) if g is None else np.sort(g.covering(to_day(date)))
+
+    def count_on(self, dates, team=None) -> np.ndarray:
+        """Number of absences covering each date."""
+        days = pd.to_datetime(pd.Index(dates)).to_numpy().astype("datetime64[D]").astype(np.int64)
+        g = self.groups.get(team)
+        return np.zeros(len(days), dtype=np.int64) if g is None else g.count(days)
+
+    def weekly(self) -> pd.DataFrame:
+        """Long frame (week, team, absent): absences overlapping each Monday-to-Sunday week, per team.
+
+        Only weeks with at least one absence are listed (the frame stays sparse,
+        and chunk results add up); reindex on the Monday range for a dense series.
+        """
+        if len(self) == 0 or self.group_col is None:
+            return pd.DataFrame({"week": [], "team": [], "absent": []})
+        weeks = np.arange(week_start(self.first_day), self.last_day + 1, 7, dtype=np.int64)
+        parts = []
+        for team in self.teams():
+            counts = self.groups[team].overlapping(weeks, weeks + 7)
+            nz = counts > 0
+            parts.append(pd.DataFrame({"week": weeks[nz], "team": team, "absent": counts[nz]}))
+        out = pd.concat(parts, ignore_index=True)
+        out["week"] = np.datetime_as_string(out["week"].to_numpy().astype("datetime64[D]"))
+        return out
+
+    def durations(self, team=None) -> np.ndarray:
+        """Sorted absence lengths in days."""
+        g = self.groups.get(team)
+        return np.empty(0, dtype=np.int64) if g is None else g.durations
+
+    def recovered_within(self, days, team=None) -> np.ndarray:
+        """Share of absences that lasted at most each number of days."""
+        d = self.durations(team)
+        if not len(d):
+            return np.full(np.shape(days), np.nan)
+        return np.searchsorted(d, days, side="right") / len(d)
+
+    def duration_quantiles(self, qs=(0.1, 0.25, 0.5, 0.75, 0.9), team=None) -> pd.Series:
+        d = self.durations(team)
+        if not len(d):
+            return pd.Series(np.nan, index=list(qs), name="days")
+        # same as np.quantile(d, qs, method="lower"), but an O(1) lookup per quantile
+        return pd.Series(d[(np.asarray(qs) * (len(d) - 1)).astype(int)], index=list(qs), name="days")
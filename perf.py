@@ -0,0 +1,97 @@
+# perf.py
+"""
+Lightweight stage profiler: wall time, peak memory and row counts.
+
+    prof = Profiler(enabled=True).activate()     # for the current thread
+    with stage("filter.take") as rec:
+        view = ...
+        rec["rows"] = len(view)
+
+stage() looks up the profiler activated in the current thread (each Streamlit
+session runs in its own thread), so library code can be instrumented without
+passing a profiler around. When no enabled profiler is active, stage() returns
+a shared no-op context, so the instrumentation costs next to nothing when off.
+Set INJURY_PROFILE=1 to enable profiling by default.
+
+Peak memory comes from tracemalloc, which is process-wide: it slows every
+allocation of every thread, and its peak counter is shared. So it is opt-in
+per process (trace_memory=True, used by the single-threaded step3 runs) and
+is never started or stopped by a per-session profiler; the dashboard's
+profilers record wall time and rows only.
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+_local = threading.local()
+_NULL = nullcontext({})  # rec["rows"] = ... on this dict is harmless
+
+def enabled_by_default() -> bool:
+    return os.environ.get("INJURY_PROFILE", "").lower() in ("1", "true", "yes", "on")
+
+def current():
+    return getattr(_local, "profiler", None)
+
+def stage(name: str, rows=None):
+    p = current()
+    if p is None or not p.enabled:
+        return _NULL
+    return p.stage(name, rows)
+
+class Profiler:
+    def __init__(self, enabled: bool = None, trace_memory: bool = False):
+        self.enabled = enabled_by_default() if enabled is None else enabled
+        self.trace_memory = trace_memory
+        self.records = []
+        self._stack = []
+
+    def activate(self):
+        _local.profiler = self
+        if self.enabled and self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        return self
+
+    @contextmanager
+    def stage(self, name: str, rows=None):
+        rec = {"stage": name, "rows": rows, "depth": len(self._stack)}
+        self.records.append(rec)
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            cur, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # keep the parent's peak before resetting it for this stage
+                self._stack[-1]["_peak"] = max(self._stack[-1]["_peak"], peak)
+            tracemalloc.reset_peak()
+            rec["_start"], rec["_peak"] = cur, cur
+        self._stack.append(rec)
+        t0 = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec["seconds"] = time.perf_counter() - t0
+            self._stack.pop()
+            if tracing:
+                peak = max(rec.pop("_peak"), tracemalloc.get_traced_memory()[1])
+                rec["peak_mb"] = (peak - rec.pop("_start")) / 1e6
+                if self._stack:
+                    self._stack[-1]["_peak"] = max(self._stack[-1]["_peak"], peak)
+
+    def extend(self, records):
+        """Add records measured elsewhere (e.g. in a worker process), nested under the open stage."""
+        offset = len(self._stack)
+        self.records.extend(dict(r, depth=r.get("depth", 0) + offset) for r in records)
+
+    def frame(self):
+        import pandas as pd
+        cols = ["stage", "seconds", "peak_mb", "rows", "depth"]
+        df = pd.DataFrame(self.records)
+        return df.reindex(columns=cols + [c for c in df.columns if c not in cols])
+
+    def write_log(self, path, **context):
+        """Append one JSON line per record (plus shared context such as run id) to path."""
+        with open(path, "a", encoding="utf-8") as f:
+            for rec in self.records:
+                f.write(json.dumps(dict(context, **rec), default=str) + "\n")
@@ -0,0 +1,82 @@
+# query_cache.py
+"""
+Thread-safe LRU cache for query results, bounded by memory instead of entry count.
+
+One cache lives in the process-wide InjuryDataset, so every Streamlit session
+shares it: the first session to ask for a (query, filters, data version)
+computes the result, the others get the same object back. Entry sizes come
+from memory_usage(deep=True), and the least recently used entries are dropped
+once the total passes the budget. Results are shared, so callers must treat
+them as read-only (copy before modifying).
+
+The lock only guards the bookkeeping; results are computed outside it, so a
+slow query never blocks other sessions. Two sessions missing the same key at
+the same moment both compute it, and the second result simply replaces the first.
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+def nbytes(value) -> int:
+    """Approximate in-memory size of a query result."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(nbytes(v) for v in value.values())
+    return sys.getsizeof(value)
+
+class QueryCache:
+    def __init__(self, budget_mb: float = 64):
+        self.budget = int(budget_mb * 1e6)
+        self._entries = OrderedDict()     # key -> (value, size), oldest first
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, compute):
+        """Cached value for key, or compute() it and cache the result."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        size = nbytes(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            if size > self.budget:
+                # larger than the whole budget: hand it out, but do not keep it
+                return
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.budget:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "mb": self.bytes / 1e6, "budget_mb": self.budget / 1e6,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
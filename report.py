@@ -0,0 +1,88 @@
+# report.py
+"""
+Report writer for the EDA outputs.
+
+Every figure page references one shared plotly.min.js in the output folder
+instead of embedding the ~4 MB bundle. Figures are also saved as compact JSON
+sidecars (plotly stores numeric arrays as base64 typed arrays), and
+write_bundle() assembles them into a single report.html that only renders a
+section's chart when it scrolls into view.
+"""
+import html
+from pathlib import Path
+
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+
+PLOTLYJS_NAME = "plotly.min.js"
+REPORT_NAME = "report.html"
+
+def ensure_plotlyjs(out_dir: Path) -> Path:
+    """Write the shared plotly.js asset once (rewritten only when the plotly version changes)."""
+    out = Path(out_dir) / PLOTLYJS_NAME
+    js = get_plotlyjs()
+    if out.exists():
+        with open(out, encoding="utf-8") as f:
+            if f.read(200) == js[:200]:
+                return out
+    out.write_text(js, encoding="utf-8")
+    return out
+
+def write_figure(fig, out: Path):
+    """Save fig as an HTML page using the shared plotly.min.js, plus a .json sidecar for the bundle."""
+    out = Path(out)
+    pio.write_html(fig, file=str(out), include_plotlyjs="directory", auto_open=False)
+    out.with_suffix(".json").write_text(fig.to_json(), encoding="utf-8")
+    return out
+
+_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 0 auto; max-width: 1100px; padding: 1em; }}
+section {{ margin-bottom: 2em; }} .chart {{ min-height: 450px; }}
+table {{ border-collapse: collapse; font-size: 0.9em; }} td, th {{ border: 1px solid #ccc; padding: 2px 6px; }}
+</style>
+<script src="{plotlyjs}"></script></head>
+<body><h1>{title}</h1>
+<ul>{toc}</ul>
+{sections}
+<script>
+// draw each chart only once its section scrolls into view
+const observer = new IntersectionObserver((entries) => {{
+  for (const e of entries) {{
+    if (!e.isIntersecting) continue;
+    const el = e.target;
+    observer.unobserve(el);
+    const fig = JSON.parse(document.getElementById(el.dataset.fig).textContent);
+    Plotly.newPlot(el, fig.data, fig.layout, {{responsive: true}});
+  }}
+}}, {{rootMargin: "200px"}});
+document.querySelectorAll(".chart").forEach((el) => observer.observe(el));
+</script>
+</body></html>
+"""
+
+def write_bundle(out_dir: Path, outputs, title="Player injuries — EDA report"):
+    """Assemble one report page from the output files (figure .json sidecars and HTML tables)."""
+    out_dir = Path(out_dir)
+    ensure_plotlyjs(out_dir)
+    toc, sections = [], []
+    for i, name in enumerate(outputs):
+        path = out_dir / name
+        anchor = f"s{i}"
+        if path.suffix == ".json":
+            # "<\/" is the same JSON string but cannot close the <script> tag early
+            fig_json = path.read_text(encoding="utf-8").replace("</", "<\\/")
+            body = (f'<div class="chart" data-fig="fig{i}"></div>'
+                    f'<script type="application/json" id="fig{i}">{fig_json}</script>')
+        elif path.suffix == ".html":
+            body = path.read_text(encoding="utf-8")
+        else:
+            continue
+        label = html.escape(path.stem)
+        toc.append(f'<li><a href="#{anchor}">{label}</a></li>')
+        sections.append(f'<section id="{anchor}"><h2>{label}</h2>{body}</section>')
+    out = out_dir / REPORT_NAME
+    out.write_text(_PAGE.format(title=html.escape(title), plotlyjs=PLOTLYJS_NAME,
+                                toc="".join(toc), sections="\n".join(sections)), encoding="utf-8")
+    return out
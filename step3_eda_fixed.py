@@ -2,28 +2,59 @@
 """
 EDA adapted to the cleaned CSV's actual columns.
 Run:
-    python step3_eda_fixed.py
-Outputs go to eda_outputs/ (HTML + CSV)
+    python step3_eda_fixed.py            (add --force to rebuild everything, --jobs N for N workers)
+    python step3_eda_fixed.py --stream   (CSV read in chunks, for files that do not fit in memory)
+Outputs go to eda_outputs/ (HTML + CSV). All pages share one plotly.min.js, and
+report.html bundles every output into a single, lazily rendered page.
+
+Each output is a declared task with the columns it reads. Tasks run in a
+process pool, and a task is skipped when the hash of its input columns and of
+the output code (this script plus the CODE_MODULES it calls) matches the
+previous run (see eda_outputs/.eda_manifest.json).
 """
 import pandas as pd
+import plotly
 import plotly.express as px
-import plotly.io as pio
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Callable, NamedTuple
+import argparse
+import functools
+import hashlib
+import importlib
+import inspect
+import json
+import time
 import traceback
 import sys
 import os
 
+from charts import SCATTER_BIN_POINTS, adaptive_scatter, binned_figure, count_heatmap, grid_counts, grid_matrix
+from features import has_dates
+from injury_data import SCHEMA_VERSION, ingest, iter_injuries, memory_report
+from intervals import AbsenceIndex
+from perf import Profiler, stage
+from report import ensure_plotlyjs, write_bundle, write_figure
+from trendline import add_trendlines, fit_from_stats, merge_stats, sufficient_stats
+
 CLEAN_CSV = r"E:\XII IBCP\AI\Maths\data\player_injuries_impact_cleaned.csv"
 OUT_DIR = Path.cwd() / "eda_outputs"
 OUT_DIR.mkdir(exist_ok=True)
+MANIFEST_NAME = ".eda_manifest.json"
+TIMINGS_LOG = "eda_timings.jsonl"   # written next to eda_outputs/
 
 def safe_read(csv_path):
     print("Checking file:", csv_path)
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"CSV not found at: {csv_path}")
     try:
-        df = pd.read_csv(csv_path, low_memory=False)
-        print("Loaded OK — shape:", df.shape)
+        # snapshot + incremental ingest: only rows appended since the last run are parsed
+        result = ingest(csv_path)
+        df = result.frame
+        print(f"Loaded OK ({result.mode}) — shape:", df.shape)
+        report = memory_report(df)
+        print(f"In-memory size: {report['bytes'].iloc[-1] / 1e6:.2f} MB (largest columns below)")
+        print(report.head(5).to_string(index=False))
         return df
     except Exception as e:
         print("Error while reading CSV:")
@@ -42,158 +73,392 @@ def has_cols(df, required):
         return False
     return True
 
-def safe_to_datetime(df, col):
-    if col in df.columns:
-        try:
-            df[col] = pd.to_datetime(df[col], errors='coerce')
-            print(f"Converted column '{col}' to datetime (NaT count: {df[col].isna().sum()})")
-        except Exception as e:
-            print(f"[WARN] Failed to convert {col} to datetime:", e)
+def player_col(df):
+    return 'player_name' if 'player_name' in df.columns else ('name' if 'name' in df.columns else None)
 
-def main():
-    try:
-        df = safe_read(CLEAN_CSV)
-        print_columns(df)
-
-        # normalize column names to lowercase stripped for easier checks,
-        orig_cols = list(df.columns)
-        df.columns = [c.strip().lower() for c in df.columns]
-        print("Normalized column names to lower-case/stripped.")
-        print("\nNormalized columns:")
-        print(df.columns.tolist())
-
-        # convert known date-like columns if present
-        # your file uses 'date of injury' / 'date of return'
-        for date_col in ['date of injury','date_of_injury','date of return','date_of_return']:
-            if date_col in df.columns:
-                safe_to_datetime(df, date_col)
-
-        # Ensure numeric rating column is available: use 'fifa_rating'
-        if 'fifa_rating' in df.columns:
-            df['fifa_rating'] = pd.to_numeric(df['fifa_rating'], errors='coerce')
-
-        # You already have avg_rating_before/after in your file; ensure numeric
-        for c in ['avg_rating_before','avg_rating_after','performance_drop_index','age']:
-            if c in df.columns:
-                df[c] = pd.to_numeric(df[c], errors='coerce')
-
-        # ----------------- 1) BAR: Top 10 performance drop injuries -----------------
-        if 'performance_drop_index' in df.columns and df['performance_drop_index'].notna().any():
-            top10 = df.sort_values('performance_drop_index', ascending=False).head(10)
-            xcol = 'player_name' if 'player_name' in df.columns else ('player_name' if 'player_name' in orig_cols else 'player_name')
-            # your file uses 'player_name' normalized to 'player_name' already
-            # use 'player_name' (or 'player_name' fallback is same)
-            # but original was 'player_name' -> present as 'player_name'
-            # In your dataset it's 'player_name' (normalized). We'll use 'player_name' or 'name'.
-            if 'player_name' not in df.columns and 'name' in df.columns:
-                name_col = 'name'
-            elif 'player_name' in df.columns:
-                name_col = 'player_name'
-            else:
-                # try 'player_name' or 'name' from original columns
-                name_col = None
-                for alt in ['name','player_name','player_name']:
-                    if alt in df.columns:
-                        name_col = alt
-                        break
-            if name_col is None:
-                # fallback to index
-                fig1 = px.bar(top10.reset_index(), x=top10.reset_index().index, y='performance_drop_index',
-                              title="Top 10 Injuries by Performance Drop Index")
-            else:
-                fig1 = px.bar(top10, x=name_col, y='performance_drop_index',
-                              hover_data=[c for c in ['team','date of injury','date_of_injury'] if c in df.columns],
-                              title="Top 10 Injuries by Performance Drop Index")
-            out = OUT_DIR / "1_top10_perf_drop.html"
-            pio.write_html(fig1, file=out, auto_open=False)
-            print("Saved:", out)
-        else:
-            print("[SKIP] 1) performance_drop_index not available or all null.")
-
-        # ----------------- 2) Alternative timeline: Before vs After per player -----------------
-        # Original timeline required match_date; we don't have that in the file.
-        # Instead create a before-vs-after bar chart for a chosen player using avg_rating_before / avg_rating_after
-        if 'avg_rating_before' in df.columns and 'avg_rating_after' in df.columns:
-            # choose default player
-            name_col = 'player_name' if 'player_name' in df.columns else ('name' if 'name' in df.columns else None)
-            if name_col is None:
-                print("[SKIP] 2) timeline alternative - no player name column found.")
-            else:
-                # default choose the player with most records
-                default_player = df[name_col].value_counts().idxmax() if df.shape[0] > 0 else None
-                print("Default player for before/after bar:", default_player)
-                # For script usage (non-interactive), we auto-select default_player
-                sel = default_player
-                if sel is not None:
-                    p_df = df[df[name_col] == sel]
-                    # compute mean before and after for that player (some rows may be duplicates across seasons)
-                    before_val = p_df['avg_rating_before'].mean(skipna=True)
-                    after_val = p_df['avg_rating_after'].mean(skipna=True)
-                    bar_df = pd.DataFrame({
-                        'phase': ['avg_before', 'avg_after'],
-                        'rating': [before_val, after_val]
-                    })
-                    fig2 = px.bar(bar_df, x='phase', y='rating', title=f"Avg before vs after injury — {sel}", text='rating')
-                    out2 = OUT_DIR / f"2_before_after_{str(sel).replace(' ','_')}.html"
-                    pio.write_html(fig2, file=out2, auto_open=False)
-                    print("Saved (before/after bar):", out2)
-                else:
-                    print("[SKIP] 2) timeline alternative - no default player found.")
-        else:
-            print("[SKIP] 2) timeline alternative - avg_rating_before/avg_rating_after missing.")
-
-        # ----------------- 3) HEATMAP: Injury frequency by injury_month and team -----------------
-        # Use your normalized columns: 'injury_month' and 'team'
-        if 'injury_month' in df.columns and 'team' in df.columns:
-            heat = df.groupby(['injury_month','team']).size().reset_index(name='count')
-            pivot = heat.pivot(index='team', columns='injury_month', values='count').fillna(0)
-            pivot_long = pivot.reset_index().melt(id_vars='team', var_name='injury_month', value_name='count')
-            fig3 = px.density_heatmap(pivot_long, x='injury_month', y='team', z='count',
-                                      title="Injury frequency by month and team (heatmap)")
-            out = OUT_DIR / "3_heatmap_month_team.html"
-            pio.write_html(fig3, file=out, auto_open=False)
-            print("Saved:", out)
-        else:
-            print("[SKIP] 3) heatmap - 'injury_month' or 'team' missing")
-
-        # ----------------- 4) SCATTER: Age vs Performance Drop -----------------
-        if 'age' in df.columns and 'performance_drop_index' in df.columns:
-            sc = df.dropna(subset=['age','performance_drop_index'])
-            if sc.shape[0] > 0:
-                fig4 = px.scatter(sc, x='age', y='performance_drop_index', hover_data=[c for c in ['player_name','team','name'] if c in df.columns],
-                                  trendline='ols', title="Age vs Performance Drop Index")
-                out = OUT_DIR / "4_scatter_age_perf_drop.html"
-                pio.write_html(fig4, file=out, auto_open=False)
-                print("Saved:", out)
-            else:
-                print("[SKIP] 4) scatter - not enough non-null age & performance_drop_index pairs")
+# ----------------- mergeable task states -----------------
+# Every output is split into partial(df) -> state, merge(a, b) -> state,
+# finish(state) -> result (None = skipped) and render(result, out_dir) -> files.
+# The in-memory run finishes partial() of the whole frame; --stream merges the
+# partial states of every chunk, so both produce the same outputs.
+PLAYER_MEASURES = ['avg_rating_before', 'avg_rating_after', 'performance_drop_index']
+SCATTER_STEPS = (1.0, 0.25)     # fixed age / performance_drop_index cell sizes for the binned scatter
+
+def player_partial(df):
+    """Per-player row count plus sum / count of each measure, in order of first appearance."""
+    name_col = player_col(df)
+    if name_col is None:
+        return None
+    vals = df[[c for c in PLAYER_MEASURES if c in df.columns]].astype('float64')
+    g = vals.groupby(df[name_col].rename('player'), sort=False)
+    return pd.concat([g.size().rename('rows'), g.sum().add_suffix('_sum'), g.count().add_suffix('_n')], axis=1)
+
+def player_merge(a, b):
+    return pd.concat([a, b]).groupby(level=0, sort=False).sum()
+
+def player_means(state):
+    out = pd.DataFrame(index=state.index)
+    for c in PLAYER_MEASURES:
+        if f"{c}_sum" in state.columns:
+            out[c] = state[f"{c}_sum"] / state[f"{c}_n"]
+    return out
+
+# ----------------- 1) BAR: Top 10 performance drop injuries -----------------
+def top10_partial(df):
+    if 'performance_drop_index' not in df.columns:
+        return None
+    # keep='first' -> ties go to the earlier row, whether the rows arrive at once or in chunks
+    return df.nlargest(10, 'performance_drop_index', keep='first')
+
+def top10_merge(a, b):
+    return top10_partial(pd.concat([a, b]))
+
+def top10_finish(top10):
+    if top10 is None or top10.empty:
+        print("[SKIP] 1) performance_drop_index not available or all null.")
+        return None
+    return top10
+
+def top10_perf_drop(top10, out_dir):
+    name_col = player_col(top10)
+    if name_col is None:
+        # fallback to index
+        fig1 = px.bar(top10.reset_index(), x=top10.reset_index().index, y='performance_drop_index',
+                      title="Top 10 Injuries by Performance Drop Index")
+    else:
+        fig1 = px.bar(top10, x=name_col, y='performance_drop_index',
+                      hover_data=[c for c in ['team','date_of_injury'] if c in top10.columns],
+                      title="Top 10 Injuries by Performance Drop Index")
+    out = out_dir / "1_top10_perf_drop.html"
+    write_figure(fig1, out)
+    print("Saved:", out)
+    return [out, out.with_suffix('.json')]
+
+# ----------------- 2) Alternative timeline: Before vs After per player -----------------
+# Original timeline required match_date; we don't have that in the file.
+# Instead create a before-vs-after bar chart for a chosen player using avg_rating_before / avg_rating_after
+def before_after_finish(players):
+    if players is None:
+        print("[SKIP] 2) timeline alternative - no player name column found.")
+        return None
+    if 'avg_rating_before_sum' not in players.columns or 'avg_rating_after_sum' not in players.columns:
+        print("[SKIP] 2) timeline alternative - avg_rating_before/avg_rating_after missing.")
+        return None
+    # default choose the player with most records (ties -> the one seen first)
+    default_player = players['rows'].idxmax() if len(players) else None
+    print("Default player for before/after bar:", default_player)
+    if default_player is None:
+        print("[SKIP] 2) timeline alternative - no default player found.")
+        return None
+    # mean before and after for that player (some rows may be duplicates across seasons)
+    means = player_means(players).loc[default_player]
+    return {'player': default_player, 'before': means['avg_rating_before'], 'after': means['avg_rating_after']}
+
+def before_after_default_player(res, out_dir):
+    sel = res['player']
+    bar_df = pd.DataFrame({
+        'phase': ['avg_before', 'avg_after'],
+        'rating': [res['before'], res['after']]
+    })
+    fig2 = px.bar(bar_df, x='phase', y='rating', title=f"Avg before vs after injury — {sel}", text='rating')
+    out2 = out_dir / f"2_before_after_{str(sel).replace(' ','_')}.html"
+    write_figure(fig2, out2)
+    print("Saved (before/after bar):", out2)
+    return [out2, out2.with_suffix('.json')]
+
+# ----------------- 3) HEATMAP: Injury frequency by injury_month and team -----------------
+def heatmap_partial(df):
+    if 'injury_month' not in df.columns or 'team' not in df.columns:
+        return None
+    counts = df.groupby(['injury_month','team'], observed=True).size()
+    # plain string keys: every chunk has its own categories
+    counts.index = pd.MultiIndex.from_arrays([counts.index.get_level_values(i).astype(str) for i in range(2)],
+                                             names=['injury_month', 'team'])
+    return counts
+
+def heatmap_merge(a, b):
+    return a.add(b, fill_value=0)
+
+def heatmap_finish(counts):
+    if counts is None:
+        print("[SKIP] 3) heatmap - 'injury_month' or 'team' missing")
+        return None
+    return counts.astype('int64').reset_index(name='count')
+
+def heatmap_month_team(heat, out_dir):
+    fig3 = count_heatmap(heat, x='injury_month', y='team', title="Injury frequency by month and team (heatmap)")
+    out = out_dir / "3_heatmap_month_team.html"
+    write_figure(fig3, out)
+    print("Saved:", out)
+    return [out, out.with_suffix('.json')]
+
+# ----------------- 4) SCATTER: Age vs Performance Drop -----------------
+def scatter_partial(df):
+    if 'age' not in df.columns or 'performance_drop_index' not in df.columns:
+        return None
+    sc = df.dropna(subset=['age','performance_drop_index'])
+    return {
+        'n': len(sc),
+        # raw points only while they would still be drawn as points; the grid covers the rest
+        'points': sc.drop(columns=[c for c in sc.columns if c not in ('age', 'performance_drop_index', 'player_name', 'team', 'name')])
+                  if len(sc) <= SCATTER_BIN_POINTS else None,
+        'grid': grid_counts(sc['age'], sc['performance_drop_index'], *SCATTER_STEPS),
+        'stats': sufficient_stats(sc['age'], sc['performance_drop_index']),
+    }
+
+def scatter_merge(a, b):
+    n = a['n'] + b['n']
+    keep = n <= SCATTER_BIN_POINTS and a['points'] is not None and b['points'] is not None
+    return {
+        'n': n,
+        'points': pd.concat([a['points'], b['points']]) if keep else None,
+        'grid': a['grid'].add(b['grid'], fill_value=0),
+        'stats': merge_stats(a['stats'], b['stats']),
+    }
+
+def scatter_finish(state):
+    if state is None:
+        print("[SKIP] 4) scatter - 'age' or 'performance_drop_index' missing")
+        return None
+    if state['n'] == 0:
+        print("[SKIP] 4) scatter - not enough non-null age & performance_drop_index pairs")
+        return None
+    return {'points': state['points'], 'grid': state['grid'], 'fit': fit_from_stats(state['stats'])}
+
+def scatter_age_perf_drop(res, out_dir):
+    title = "Age vs Performance Drop Index"
+    sc = res['points']
+    if sc is not None:
+        fig4 = adaptive_scatter(sc, x='age', y='performance_drop_index', hover_data=[c for c in ['player_name','team','name'] if c in sc.columns],
+                                title=title)
+    else:
+        fig4 = binned_figure(*grid_matrix(res['grid'], *SCATTER_STEPS), x='age', y='performance_drop_index', title=title)
+    fit = res['fit']
+    add_trendlines(fig4, fit)
+    print("OLS fit (age -> performance_drop_index):")
+    print(fit.round(4).to_string())
+    out = out_dir / "4_scatter_age_perf_drop.html"
+    write_figure(fig4, out)
+    print("Saved:", out)
+    return [out, out.with_suffix('.json')]
+
+# ----------------- 5) LEADERBOARD: Best comeback players using avg ratings -----------------
+def leaderboard_finish(players):
+    if players is None:
+        print("[SKIP] 5) leaderboard - no name column found")
+        return None
+    if 'avg_rating_before_sum' not in players.columns or 'avg_rating_after_sum' not in players.columns:
+        print("[SKIP] 5) leaderboard - avg_rating_before / avg_rating_after missing")
+        return None
+    summary = player_means(players).sort_index().reset_index()
+    summary['rating_improvement'] = summary['avg_rating_after'] - summary['avg_rating_before']
+    return summary.sort_values('rating_improvement', ascending=False).head(20)
+
+def leaderboard_top_improvements(leaderboard, out_dir):
+    out_csv = out_dir / "5_leaderboard_top_improvements.csv"
+    out_html = out_dir / "5_leaderboard_top_improvements.html"
+    leaderboard.to_csv(out_csv, index=False)
+    out_html.write_text(leaderboard.to_html(index=False))
+    print("Saved leaderboard CSV and HTML:", out_csv)
+    return [out_csv, out_html]
+
+# ----------------- 6) HEATMAP: Concurrent absences per team and week -----------------
+def absences_partial(df):
+    if not has_dates(df) or 'team' not in df.columns:
+        return None
+    # weeks start on Mondays, so the counts of separate chunks line up and add up
+    return AbsenceIndex(df, 'team').weekly().set_index(['week', 'team'])['absent']
+
+def absences_merge(a, b):
+    return a.add(b, fill_value=0)
+
+def absences_finish(weekly):
+    if weekly is None:
+        print("[SKIP] 6) absences - 'date_of_injury', 'date_of_return' or 'team' missing")
+        return None
+    if weekly.empty:
+        print("[SKIP] 6) absences - no rows with both an injury and a return date")
+        return None
+    return weekly.astype('int64').sort_index().reset_index()
+
+def absences_by_week(weekly, out_dir):
+    fig6 = count_heatmap(weekly, x='week', y='team', z='absent', title="Concurrent absences per team and week")
+    out = out_dir / "6_absences_by_week.html"
+    out_csv = out_dir / "6_absences_by_week.csv"
+    write_figure(fig6, out)
+    weekly.to_csv(out_csv, index=False)
+    print("Saved:", out, "and", out_csv)
+    return [out, out.with_suffix('.json'), out_csv]
+
+# ----------------- task table -----------------
+class Task(NamedTuple):
+    name: str
+    partial: Callable  # input slice -> mergeable state (None when its columns are missing)
+    merge: Callable    # (state, state) -> state
+    finish: Callable   # state -> result, or None (prints why it is skipped)
+    render: Callable   # (result, out_dir) -> written files
+    columns: tuple     # input columns; absent ones are ignored
+
+    def run(self, data, out_dir):
+        result = self.finish(self.partial(data))
+        return [] if result is None else self.render(result, out_dir)
+
+NAME_COLS = ('player_name', 'name')
+TASKS = [
+    Task("1_top10_perf_drop", top10_partial, top10_merge, top10_finish, top10_perf_drop,
+         ('performance_drop_index', 'team', 'date_of_injury') + NAME_COLS),
+    Task("2_before_after", player_partial, player_merge, before_after_finish, before_after_default_player,
+         ('avg_rating_before', 'avg_rating_after') + NAME_COLS),
+    Task("3_heatmap_month_team", heatmap_partial, heatmap_merge, heatmap_finish, heatmap_month_team,
+         ('injury_month', 'team')),
+    Task("4_scatter_age_perf_drop", scatter_partial, scatter_merge, scatter_finish, scatter_age_perf_drop,
+         ('age', 'performance_drop_index', 'team') + NAME_COLS),
+    Task("5_leaderboard", player_partial, player_merge, leaderboard_finish, leaderboard_top_improvements,
+         ('avg_rating_before', 'avg_rating_after', 'performance_drop_index') + NAME_COLS),
+    Task("6_absences_by_week", absences_partial, absences_merge, absences_finish, absences_by_week,
+         ('date_of_injury', 'date_of_return', 'team')),
+]
+TASKS_BY_NAME = {t.name: t for t in TASKS}
+
+def task_input(df, task):
+    return df[[c for c in task.columns if c in df.columns]]
+
+# every module whose code shapes an output: the tasks and their helpers here, plus the
+# figure, report and fitting code they call. Any edit to them rebuilds every output.
+CODE_MODULES = ("charts", "intervals", "report", "trendline")
+
+@functools.lru_cache(maxsize=None)
+def code_digest():
+    h = hashlib.sha1(inspect.getsource(sys.modules[__name__]).encode("utf-8"))
+    for name in CODE_MODULES:
+        h.update(inspect.getsource(importlib.import_module(name)).encode("utf-8"))
+    return h.hexdigest()
+
+def task_hasher(task, data):
+    """sha1 over the output code, input dtypes and schema / plotly version; feed it the input rows next."""
+    h = hashlib.sha1()
+    h.update(f"{task.name}|{SCHEMA_VERSION}|{plotly.__version__}|{code_digest()}|".encode("utf-8"))
+    h.update(repr([(c, str(data[c].dtype)) for c in data.columns]).encode("utf-8"))
+    return h
+
+def hash_rows(h, data):
+    # row hashes are value based, so hashing chunk by chunk gives the same digest as the whole frame
+    h.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+
+def task_hash(task, data):
+    """Content hash of a task's input slice + its code (+ schema / plotly version)."""
+    h = task_hasher(task, data)
+    hash_rows(h, data)
+    return h.hexdigest()
+
+def run_task(name, data, out_dir, profile=False, state=False):
+    # module-level so the process pool can pickle it; returns (outputs, timing records).
+    # data is the task's input slice, or its merged state when state=True (streaming mode)
+    task = TASKS_BY_NAME[name]
+    prof = Profiler(enabled=profile, trace_memory=True).activate()
+    with stage(f"task.{name}", rows=None if state else len(data)):
+        if state:
+            result = task.finish(data)
+            outputs = [] if result is None else task.render(result, Path(out_dir))
         else:
-            print("[SKIP] 4) scatter - 'age' or 'performance_drop_index' missing")
-
-        # ----------------- 5) LEADERBOARD: Best comeback players using avg ratings -----------------
-        # Use avg_rating_before / avg_rating_after to compute improvement
-        if 'avg_rating_before' in df.columns and 'avg_rating_after' in df.columns:
-            name_col = 'player_name' if 'player_name' in df.columns else ('name' if 'name' in df.columns else None)
-            if name_col is None:
-                print("[SKIP] 5) leaderboard - no name column found")
-            else:
-                summary = df.groupby(name_col).agg({
-                    'avg_rating_before': 'mean',
-                    'avg_rating_after': 'mean',
-                    'performance_drop_index': 'mean'
-                }).reset_index().rename(columns={name_col: 'player'})
-                summary['rating_improvement'] = summary['avg_rating_after'] - summary['avg_rating_before']
-                leaderboard = summary.sort_values('rating_improvement', ascending=False).head(20)
-                out_csv = OUT_DIR / "5_leaderboard_top_improvements.csv"
-                leaderboard.to_csv(out_csv, index=False)
-                (OUT_DIR / "5_leaderboard_top_improvements.html").write_text(leaderboard.to_html(index=False))
-                print("Saved leaderboard CSV and HTML:", out_csv)
+            outputs = task.run(data, Path(out_dir))
+    return [str(p) for p in outputs], prof.records
+
+def load_manifest(out_dir):
+    try:
+        return json.loads((out_dir / MANIFEST_NAME).read_text())
+    except Exception:
+        return {}
+
+def run_tasks(df, out_dir, jobs=None, force=False, prof=None):
+    inputs = {}
+    for task in TASKS:
+        data = task_input(df, task)
+        inputs[task.name] = (data, task_hash(task, data))
+    return render_tasks(inputs, out_dir, jobs, force, prof)
+
+def stream_tasks(csv_path, out_dir, chunksize, jobs=None, force=False, prof=None):
+    """One pass over the CSV in chunks; only the merged per-task states stay in memory."""
+    states, hashers, rows = {}, {}, 0
+    for chunk in iter_injuries(csv_path, chunksize):
+        rows += len(chunk)
+        for task in TASKS:
+            data = task_input(chunk, task)
+            if task.name not in hashers:
+                hashers[task.name] = task_hasher(task, data)
+            hash_rows(hashers[task.name], data)
+            part, prev = task.partial(data), states.get(task.name)
+            states[task.name] = part if prev is None else prev if part is None else task.merge(prev, part)
+        print(f"  streamed {rows:,} rows", end="\r")
+    print(f"Streamed {rows:,} rows in chunks of {chunksize:,}")
+    inputs = {t.name: (states.get(t.name), hashers[t.name].hexdigest()) for t in TASKS if t.name in hashers}
+    return render_tasks(inputs, out_dir, jobs, force, prof, state=True), rows
+
+def render_tasks(inputs, out_dir, jobs=None, force=False, prof=None, state=False):
+    manifest = load_manifest(out_dir)
+    todo = {}
+    for name, (data, digest) in inputs.items():
+        prev = manifest.get(name, {})
+        if not force and prev.get("hash") == digest and all((out_dir / f).exists() for f in prev.get("outputs", [])):
+            print(f"[UP-TO-DATE] {name}")
+            continue
+        todo[name] = (data, digest)
+
+    results = {}
+    profile = prof is not None and prof.enabled
+    # shared plotly.min.js, written once here so the workers never race on it
+    ensure_plotlyjs(out_dir)
+    if len(todo) <= 1 or jobs == 1:
+        for name, (data, _) in todo.items():
+            results[name] = run_task(name, data, out_dir, profile, state)
+    elif todo:
+        with ProcessPoolExecutor(max_workers=min(len(todo), jobs or os.cpu_count() or 1)) as pool:
+            futures = {name: pool.submit(run_task, name, data, str(out_dir), profile, state) for name, (data, _) in todo.items()}
+            for name, fut in futures.items():
+                results[name] = fut.result()
+
+    for name, (outputs, records) in results.items():
+        if prof is not None:
+            prof.extend(records)
+        manifest[name] = {"hash": todo[name][1], "outputs": [Path(p).name for p in outputs]}
+    (out_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+
+    # one page with every figure + the leaderboard table, sharing plotly.min.js
+    bundle = [f for t in TASKS for f in manifest.get(t.name, {}).get("outputs", []) if f.endswith((".json", "leaderboard_top_improvements.html"))]
+    print("Saved report bundle:", write_bundle(out_dir, bundle))
+    return results
+
+def main(jobs=None, force=False, profile=None, chunksize=None):
+    try:
+        # one script run per process, so tracemalloc's peaks belong to this run alone
+        prof = Profiler(enabled=profile, trace_memory=True).activate()
+        if chunksize:
+            # streaming: memory is bounded by the chunk size, not by the CSV
+            print("Streaming file:", CLEAN_CSV)
+            if not os.path.exists(CLEAN_CSV):
+                raise FileNotFoundError(f"CSV not found at: {CLEAN_CSV}")
+            with stage("stream") as rec:
+                _, rec["rows"] = stream_tasks(CLEAN_CSV, OUT_DIR, chunksize, jobs=jobs, force=force, prof=prof)
         else:
-            print("[SKIP] 5) leaderboard - avg_rating_before / avg_rating_after missing")
+            with stage("load") as rec:
+                df = safe_read(CLEAN_CSV)
+                rec["rows"] = len(df)
+            # columns are already normalized + derived by features.build_features
+            print_columns(df)
+
+            with stage("tasks", rows=len(df)):
+                run_tasks(df, OUT_DIR, jobs=jobs, force=force, prof=prof)
+
+        if prof.enabled:
+            log = OUT_DIR.parent / TIMINGS_LOG
+            prof.write_log(log, run=time.strftime("%Y-%m-%dT%H:%M:%S"), source=str(CLEAN_CSV))
+            print("\nStage timings (also appended to", log, "):")
+            print(prof.frame().round(4).to_string(index=False))
 
         print("\nEDA complete. Check the 'eda_outputs' folder for generated files:")
         for f in sorted(OUT_DIR.iterdir()):
-            print(" -", f.name)
+            if not f.name.startswith("."):
+                print(" -", f.name)
 
     except Exception as ex:
         print("\n=== ERROR ===")
@@ -202,4 +467,12 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="EDA outputs for the cleaned injuries CSV")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count, 1 = serial)")
+    parser.add_argument("--force", action="store_true", help="rebuild every output even if its inputs are unchanged")
+    parser.add_argument("--profile", action="store_true", default=None,
+                        help=f"record stage timings/peak memory to {TIMINGS_LOG} (or set INJURY_PROFILE=1)")
+    parser.add_argument("--stream", action="store_true", help="read the CSV in chunks instead of loading it whole")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="rows per chunk with --stream (default 100000)")
+    args = parser.parse_args()
+    main(jobs=args.jobs, force=args.force, profile=args.profile, chunksize=args.chunksize if args.stream else None)
@@ -0,0 +1,88 @@
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from injury_data import CACHE_DIR_NAME, _snapshot_paths, ingest
+
+SAMPLE_CSV = Path(__file__).resolve().parent.parent / "player_injuries_impact_cleaned.csv"
+
+def sample_lines():
+    return SAMPLE_CSV.read_bytes().splitlines(keepends=True)
+
+def test_append_row_with_all_na_categoricals(tmp_path):
+    lines = sample_lines()
+    # line 3 (Fabian Schär) is complete, but every after-injury Result/Opposition is "N.A."
+    assert b"N.A." in lines[3]
+    csv = tmp_path / "injuries.csv"
+    csv.write_bytes(b"".join(lines[:3]))
+    assert ingest(csv).mode == "full"
+
+    with open(csv, "ab") as f:
+        f.write(lines[3])
+    result = ingest(csv)
+    assert result.mode == "append"
+    assert len(result.frame) == 3
+
+    full = ingest(csv, use_cache=False).frame
+    # appending must give the same frame as a rebuild, down to the (sorted) categories
+    pd.testing.assert_frame_equal(result.frame, full)
+
+def test_stale_meta_does_not_duplicate_rows(tmp_path):
+    lines = sample_lines()
+    csv = tmp_path / "injuries.csv"
+    csv.write_bytes(b"".join(lines[:10]))
+    ingest(csv)
+    _, _, meta_path = _snapshot_paths(csv.resolve())
+    stale_meta = meta_path.read_text()
+
+    with open(csv, "ab") as f:
+        f.writelines(lines[10:20])
+    assert len(ingest(csv).frame) == 19
+    # another writer's meta now sits next to the newer Parquet file
+    meta_path.write_text(stale_meta)
+    with open(csv, "ab") as f:
+        f.writelines(lines[20:30])
+
+    result = ingest(csv)
+    assert len(result.frame) == 29
+    assert result.frame["player_name"].tolist() == ingest(csv, use_cache=False).frame["player_name"].tolist()
+    assert len(ingest(csv).frame) == 29
+
+def test_mtime_only_change_with_unwritable_cache(tmp_path):
+    csv = tmp_path / "injuries.csv"
+    csv.write_bytes(b"".join(sample_lines()[:5]))
+    (tmp_path / CACHE_DIR_NAME).write_text("not a directory")
+    first = ingest(csv)
+    assert len(first.frame) == 4
+    later = time.time() + 10
+    os.utime(csv, (later, later))
+    # as InjuryDataset.refresh() does: only the mtime moved, so just the meta is rewritten
+    result = ingest(csv, base=first)
+    assert result.mode == "snapshot" and len(result.frame) == 4
+
+def test_partial_last_line_is_not_consumed(tmp_path):
+    lines = sample_lines()
+    csv = tmp_path / "injuries.csv"
+    csv.write_bytes(b"".join(lines[:5]))
+    ingest(csv)
+    half = len(lines[5]) // 2
+    with open(csv, "ab") as f:
+        f.write(lines[5][:half])
+    result = ingest(csv)
+    assert len(result.frame) == 4 and result.meta["offset"] < result.meta["size"]
+
+    with open(csv, "ab") as f:
+        f.write(lines[5][half:])
+    result = ingest(csv)
+    assert result.mode == "append" and len(result.frame) == 5
+    assert result.frame["player_name"].tolist() == ingest(csv, use_cache=False).frame["player_name"].tolist()
+
+def test_settled_unterminated_last_line_is_read(tmp_path):
+    csv = tmp_path / "injuries.csv"
+    csv.write_bytes(b"".join(sample_lines()[:5]).rstrip(b"\r\n"))
+    old = time.time() - 60
+    os.utime(csv, (old, old))
+    result = ingest(csv)
+    assert len(result.frame) == 4 and result.meta["offset"] == result.meta["size"]
@@ -0,0 +1,83 @@
+# trendline.py
+"""
+Closed-form least-squares trendlines (y = intercept + slope * x).
+
+Replaces plotly's trendline='ols' so statsmodels is not needed: every group is
+fitted in one batched NumPy pass from its sufficient statistics
+(n, sum x, sum y, sum x^2, sum xy, sum y^2, min/max x). The statistics are
+additive, so partial results (e.g. per chunk) can be summed before fitting.
+"""
+import numpy as np
+import pandas as pd
+
+STAT_COLUMNS = ["n", "sx", "sy", "sxx", "sxy", "syy", "x_min", "x_max"]
+
+def sufficient_stats(x, y, groups=None) -> pd.DataFrame:
+    """Per-group sufficient statistics of the finite (x, y) pairs; one row "all" when groups is None."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    ok = np.isfinite(x) & np.isfinite(y)
+    if groups is None:
+        codes, labels = np.zeros(len(x), dtype=np.int64), pd.Index(["all"])
+    else:
+        codes, labels = pd.factorize(pd.Series(groups).reset_index(drop=True), sort=True)
+        ok &= codes >= 0
+    x, y, codes = x[ok], y[ok], codes[ok]
+    k = len(labels)
+    out = pd.DataFrame({
+        "n": np.bincount(codes, minlength=k).astype(np.float64),
+        "sx": np.bincount(codes, weights=x, minlength=k),
+        "sy": np.bincount(codes, weights=y, minlength=k),
+        "sxx": np.bincount(codes, weights=x * x, minlength=k),
+        "sxy": np.bincount(codes, weights=x * y, minlength=k),
+        "syy": np.bincount(codes, weights=y * y, minlength=k),
+    }, index=pd.Index(labels, name="group"))
+    x_min = np.full(k, np.inf)
+    x_max = np.full(k, -np.inf)
+    np.minimum.at(x_min, codes, x)
+    np.maximum.at(x_max, codes, x)
+    out["x_min"], out["x_max"] = x_min, x_max
+    return out[out["n"] > 0]
+
+def merge_stats(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    both = pd.concat([a, b])
+    g = both.groupby(level=0)
+    out = g[["n", "sx", "sy", "sxx", "sxy", "syy"]].sum()
+    out["x_min"] = g["x_min"].min()
+    out["x_max"] = g["x_max"].max()
+    return out
+
+def fit_from_stats(stats: pd.DataFrame) -> pd.DataFrame:
+    """slope, intercept, r2 and the slope's standard error for every row of stats."""
+    n, sx, sy = stats["n"], stats["sx"], stats["sy"]
+    sxx = stats["sxx"] - sx * sx / n
+    sxy = stats["sxy"] - sx * sy / n
+    syy = stats["syy"] - sy * sy / n
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = sxy / sxx
+        intercept = (sy - slope * sx) / n
+        r2 = (sxy * sxy) / (sxx * syy)
+        resid = (syy - slope * sxy).clip(lower=0)
+        stderr = np.sqrt(resid / (n - 2) / sxx).where(n > 2)
+    return pd.DataFrame({
+        "n": n.astype(int), "slope": slope, "intercept": intercept, "r2": r2, "slope_stderr": stderr,
+        "x_min": stats["x_min"], "x_max": stats["x_max"],
+    }, index=stats.index)
+
+def fit_lines(x, y, groups=None) -> pd.DataFrame:
+    return fit_from_stats(sufficient_stats(x, y, groups))
+
+def add_trendlines(fig, fits: pd.DataFrame):
+    """Draw one fitted segment per group; colors follow the scatter trace of the same name."""
+    import plotly.graph_objects as go
+    colors = {t.name: getattr(t.marker, "color", None) for t in fig.data if getattr(t, "marker", None) is not None}
+    for group, row in fits.dropna(subset=["slope"]).iterrows():
+        xs = np.array([row["x_min"], row["x_max"]])
+        label = "OLS trendline" if group == "all" else f"{group} trend"
+        fig.add_trace(go.Scatter(
+            x=xs, y=row["intercept"] + row["slope"] * xs, mode="lines", name=label,
+            legendgroup=str(group), showlegend=group != "all",
+            line=dict(color=colors.get(str(group))) if colors.get(str(group)) else None,
+            hovertemplate=f"y = {row['intercept']:.3f} + {row['slope']:.3f}·x<br>R² = {row['r2']:.3f}<extra>{label}</extra>",
+        ))
+    return fig